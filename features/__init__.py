@@ -1,7 +1,39 @@
 # Features package 
-from features.progress_report.progress_report import create_progress_report, get_git_history
-from features.summarize_details.summarize_details import summarize_details
-from features.summarize_overview.summarize_overview import summarize_overview
-from features.generate_readme.generate_readme import generate_readme, analyze_repository_structure
+import importlib
+import sys
+import types
 
-__all__ = ['create_progress_report', 'get_git_history', 'summarize_by_folder', 'summarize_overview', 'generate_readme', 'analyze_repository_structure'] 
\ No newline at end of file
+# Module that defines each exported name. Each is imported on first access
+# (PEP 562), so running one command doesn't load every other feature with it.
+_EXPORTS = {
+    'create_progress_report': 'features.progress_report.progress_report',
+    'get_git_history': 'features.progress_report.progress_report',
+    'summarize_details': 'features.summarize_details.summarize_details',
+    'summarize_overview': 'features.summarize_overview.summarize_overview',
+    'generate_readme': 'features.generate_readme.generate_readme',
+    'analyze_repository_structure': 'features.generate_readme.generate_readme',
+}
+
+__all__ = ['create_progress_report', 'get_git_history', 'summarize_details', 'summarize_overview', 'generate_readme', 'analyze_repository_structure'] 
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    # later lookups find the name directly and skip this function
+    globals()[name] = value
+    return value
+
+
+class _FeaturesPackage(types.ModuleType):
+    def __setattr__(self, name, value):
+        # importing the summarize_details, summarize_overview or generate_readme
+        # subpackage sets it as an attribute here; keep the exported function
+        # of the same name instead, which is already loaded by then
+        if name in _EXPORTS and isinstance(value, types.ModuleType):
+            value = getattr(importlib.import_module(_EXPORTS[name]), name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _FeaturesPackage
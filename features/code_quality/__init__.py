@@ -1,3 +1,19 @@
-from .security_scan_summary import generate_security_scan_summary as summary_text
-from .codeql_cwe_insights import generate_security_scan_summary as summary_json
-from .llm_file_scan import create_llm_file_scan
+import importlib
+
+# Module and attribute behind each exported name, imported on first access
+# (PEP 562) so one scan command doesn't load the others and their dependencies
+_EXPORTS = {
+    'summary_text': ('.security_scan_summary', 'generate_security_scan_summary'),
+    'summary_json': ('.codeql_cwe_insights', 'generate_security_scan_summary'),
+    'create_llm_file_scan': ('.llm_file_scan', 'create_llm_file_scan'),
+}
+
+__all__ = ['summary_text', 'summary_json', 'create_llm_file_scan']
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _EXPORTS[name]
+    value = getattr(importlib.import_module(module_name, __name__), attribute)
+    globals()[name] = value
+    return value
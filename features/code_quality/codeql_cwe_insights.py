@@ -1,7 +1,27 @@
-from openai import AzureOpenAI
 import os
 import csv
+import json
 from collections import Counter, defaultdict
+from functions.cache import files_fingerprint, read_cached_object, write_cached_object
+from functions.llm import run_parallel
+
+# Remediation tips are independent requests, so up to this many run at once
+MAX_CONCURRENT_TIPS = 5
+# Parsed CodeQL result files are cached here between runs
+SCAN_CACHE_NAMESPACE = "codeql-results-v1"
+
+def load_scan_results(input_path):
+    """Load a JSON CodeQL results file, reusing the parsed results from an
+    earlier run while the file's mtime and size are unchanged."""
+    key = files_fingerprint(os.path.dirname(input_path), [os.path.basename(input_path)])
+    scan_results = read_cached_object(SCAN_CACHE_NAMESPACE, key)
+    if scan_results is not None:
+        return scan_results
+
+    with open(input_path) as f:
+        scan_results = json.load(f)
+    write_cached_object(SCAN_CACHE_NAMESPACE, key, scan_results)
+    return scan_results
 
 def analyze_security_scan(scan_results):
     """Analyze security scan results and categorize issues by severity level."""
@@ -157,14 +177,26 @@ def generate_codeql_cwe_insights(scan_results: list, client=None) -> str:
     output.append("🧠 CodeQL CWE Insights\n" + "="*28)
     output.append(exec_summary)
     output.append("\nTop 5 Most Common CWEs:")
+
+    # Optionally generate remediation tips with LLM if client is provided,
+    # requesting them all at once instead of waiting on each in turn
+    remediations = {}
+    if client and top_cwes:
+        def fetch_tip(cwe_id):
+            cwe_info = CWE_INFO.get(cwe_id, {})
+            title = cwe_info.get("title", cwe_id)
+            description = cwe_info.get("description", "")
+            return get_remediation_tip_cached(client, cwe_id, title, description)
+
+        cwe_ids = [cwe_id for cwe_id, _ in top_cwes]
+        tips = run_parallel(fetch_tip, cwe_ids, max_concurrency=MAX_CONCURRENT_TIPS)
+        remediations = dict(zip(cwe_ids, tips))
+
     for cwe_id, count in top_cwes:
         cwe_info = CWE_INFO.get(cwe_id, {})
         title = cwe_info.get("title", cwe_id)
         description = cwe_info.get("description", "")
-        # Optionally generate remediation tip with LLM if client is provided
-        remediation = ""
-        if client:
-            remediation = get_remediation_tip_cached(client, cwe_id, title, description)
+        remediation = remediations.get(cwe_id, "")
         output.append(
             f"{cwe_id} ({title}) - {count} finding(s)\n"
             f"   Description: {description}\n"
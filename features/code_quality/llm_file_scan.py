@@ -1,6 +1,29 @@
 import os
 import json
+import functools
 from openai import AzureOpenAI
+from functions.llm import run_parallel
+
+# Characters of code sent in one request; files are packed into as few requests
+# as fit, so small scans still take a single round trip
+MAX_PACK_CHARS = 200_000
+
+def pack_code_samples(code_samples, max_chars=MAX_PACK_CHARS):
+    """Group code samples in order into packs of at most max_chars characters each."""
+    packs = []
+    current = []
+    current_size = 0
+    for sample in code_samples:
+        if current and current_size + len(sample) > max_chars:
+            packs.append(current)
+            current = []
+            current_size = 0
+        # a sample larger than max_chars still gets a pack of its own
+        current.append(sample)
+        current_size += len(sample)
+    if current:
+        packs.append(current)
+    return packs
 
 def analyze_files_with_llm(file_paths, client: AzureOpenAI):
     """Analyze code files using an LLM and return a list of security issues as JSON."""
@@ -9,6 +32,21 @@ def analyze_files_with_llm(file_paths, client: AzureOpenAI):
         with open(path, "r") as f:
             code_samples.append(f.read())
 
+    packs = pack_code_samples(code_samples)
+    if len(packs) == 1:
+        return analyze_code_samples(packs[0], client)
+
+    # each pack is an independent request, so they run concurrently
+    issues = []
+    for pack_issues in run_parallel(lambda pack: analyze_code_samples(pack, client), packs):
+        if isinstance(pack_issues, list):
+            issues.extend(pack_issues)
+        else:
+            issues.append(pack_issues)
+    return issues
+
+def analyze_code_samples(code_samples, client: AzureOpenAI):
+    """Analyze one pack of code samples with a single LLM request."""
     prompt = (
     "You are a security analysis assistant. "
     "Analyze the following code for security vulnerabilities. "
@@ -59,13 +97,18 @@ def create_llm_file_scan(client: AzureOpenAI, file_paths: list) -> list:
     return issues
 
 def collect_code_files_from_path(path, exts=None):
+    """Return path itself if it is not a directory, else the files under it with one of exts."""
+    # walks are memoised, so a path given twice is only walked once
+    return list(_collect_code_files(path, frozenset(exts) if exts else None))
+
+@functools.lru_cache(maxsize=None)
+def _collect_code_files(path, exts):
+    # files named explicitly are scanned whatever their extension
+    if not os.path.isdir(path):
+        return (path,)
     collected = []
-    if os.path.isfile(path):
-        if not exts or os.path.splitext(path)[1] in exts:
-            collected.append(path)
-    elif os.path.isdir(path):
-        for root, _, files in os.walk(path):
-            for file in files:
-                if not exts or os.path.splitext(file)[1] in exts:
-                    collected.append(os.path.join(root, file))
-    return collected
+    for root, _, files in os.walk(path):
+        for file in files:
+            if not exts or os.path.splitext(file)[1] in exts:
+                collected.append(os.path.join(root, file))
+    return tuple(collected)
@@ -1,4 +1,10 @@
+import os
 from typing import List, Dict
+from functions.cache import files_fingerprint, read_cached_object, write_cached_object
+from functions.json_stream import iter_json_array
+
+# Parsed scan files are cached here; bump the version when SecurityScanResult changes
+SCAN_CACHE_NAMESPACE = "scan-results-v1"
 
 class SecurityScanResult:
     def __init__(self, description: str, severity: str, cwe_id: str):
@@ -10,6 +16,22 @@ class SecurityScanResult:
         return f"{self.issue} (Severity: {self.severity}, CWE: {self.cwe})"
 
 
+def load_scan_results(input_path: str) -> List[SecurityScanResult]:
+    """Load a JSON scan file as SecurityScanResult objects, reusing the parsed
+    results from an earlier run while the file's mtime and size are unchanged."""
+    key = files_fingerprint(os.path.dirname(input_path), [os.path.basename(input_path)])
+    results = read_cached_object(SCAN_CACHE_NAMESPACE, key)
+    if results is not None:
+        return results
+
+    # Convert each issue to a SecurityScanResult as it is parsed, so the whole
+    # list of raw dicts is never held in memory next to the objects
+    with open(input_path) as f:
+        results = [SecurityScanResult(**issue) for issue in iter_json_array(f)]
+    write_cached_object(SCAN_CACHE_NAMESPACE, key, results)
+    return results
+
+
 def summarize_security_scan(results: List[SecurityScanResult]) -> Dict[str, List[SecurityScanResult]]:
     summary = {
         "Critical": [],
@@ -1,12 +1,17 @@
 import os
 import json
-import openai
-from openai import AzureOpenAI
-from dotenv import load_dotenv
+import itertools
 from pathlib import Path
-from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 import re
+from functions.cache import repo_state_key, read_cached_text, write_cached_text
+from functions.console import console
+
+# Generated READMEs are cached per commit and working tree state
+README_CACHE_NAMESPACE = "readmes"
+README_CACHE_METADATA = {"model": "reportr", "prompt_version": 1}
+# File the generated README is written to, relative to the working directory
+README_OUTPUT_PATH = "GENERATED_README.md"
 
 def analyze_repository_structure(repo_path="."):
     """
@@ -110,10 +115,19 @@ def analyze_repository_structure(repo_path="."):
     
     return analysis
 
-def generate_readme(client, repo_path="."):
+def generate_readme(client, repo_path=".", use_cache=True):
     """
-    Generate a comprehensive README file for a repository based on its structure and content
+    Generate a comprehensive README file for a repository based on its structure and content.
+    With use_cache, an earlier README for the same commit and uncommitted changes is reused;
+    without it a new README is generated and replaces the cached one.
     """
+    # the README written by the previous run is not a change to the repository
+    cache_key = repo_state_key(repo_path, exclude=[README_OUTPUT_PATH])
+    if use_cache:
+        cached_readme = read_cached_text(README_CACHE_NAMESPACE, cache_key, README_CACHE_METADATA)
+        if cached_readme is not None:
+            return cached_readme
+
     repo_analysis = analyze_repository_structure(repo_path)
     
     # Prepare the analysis data for the LLM
@@ -125,7 +139,7 @@ Main Language: {repo_analysis['main_language']}
 
 Repository Structure:
 - Total Files: {len(repo_analysis['files'])}
-- File Extensions: {dict(list(repo_analysis['file_extensions'].items())[:10])}  # Top 10 extensions
+- File Extensions: {dict(itertools.islice(repo_analysis['file_extensions'].items(), 10))}  # Top 10 extensions
 
 Key Files Present:
 - Requirements/Dependencies: {repo_analysis['has_requirements']}
@@ -179,7 +193,6 @@ Files in Repository:
         ]
     
     # Generate the README using the LLM
-    console = Console()
     try:
         with Progress(
             SpinnerColumn(),
@@ -204,14 +217,14 @@ Files in Repository:
     # Format the README content with Rich styling
     readme_content = response.choices[0].message.content
     formatted_readme = format_markdown_readme(readme_content)
+    write_cached_text(README_CACHE_NAMESPACE, cache_key, formatted_readme, README_CACHE_METADATA)
     
     return formatted_readme 
 
-def write_to_readme_file(readme_content, output_path="GENERATED_README.md"):
+def write_to_readme_file(readme_content, output_path=README_OUTPUT_PATH):
     """
     Write the generated README content to a file
     """
-    console = Console()
     try:
         # Strip Rich formatting before writing to file
         clean_content = re.sub(r'\[/?[^\]]*\]', '', readme_content)
@@ -1,15 +1,13 @@
 import os
 import json
 import re
-from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from functions.git_history import get_git_history
-
-# initialize rich console
-console = Console()
+from functions.llm import complete_in_batch, stream_completion
+from functions.console import console
 
 
 def format_markdown_to_rich(markdown_text: str) -> str:
@@ -185,6 +183,11 @@ def create_progress_report(
     contributor_filter=None,
     branch=None,
     use_specific_user_prompt=False,
+    max_commits=None,
+    include_diffs=True,
+    git_data=None,
+    stream=False,
+    batch=False,
 ):
     """
     Create a comprehensive progress report for a git repository
@@ -195,12 +198,30 @@ def create_progress_report(
         contributor_filter: Optional list of contributor names to filter by
         include_contributor_summaries: Whether to include detailed summaries for each contributor
         branch: Optional branch name to analyze
+        max_commits: Optional cap on the number of most recent commits analyzed
+        include_diffs: Whether to send the diffs of recent commits to the model
+        git_data: Optional history already returned by get_git_history, so
+            several reports over the same period can share one git walk
+        stream: Whether to print the AI report as it is generated, before the
+            formatted panel
+        batch: Whether to send the AI request as a Batch API job, which is
+            cheaper but can take much longer
     """
 
     console.print("[bold sky_blue1]🚀 Generating Progress Report[/bold sky_blue1]")
 
     # get the git history data from functions/git_history.py
-    git_data = get_git_history(repo_path, days_back, contributor_filter, branch)
+    # only the 20 most recent commits are shown and sent to the model
+    if git_data is None:
+        git_data = get_git_history(
+            repo_path,
+            days_back,
+            contributor_filter,
+            branch,
+            max_commits=max_commits,
+            record_limit=20,
+            keep_diffs=include_diffs,
+        )
 
     if not git_data:
         console.print(
@@ -234,6 +255,7 @@ def create_progress_report(
 
     report_context += "\nRecent Commits:\n"
     for commit in git_data["commits"][:20]:  # show last 20 commits
+        diffs_line = f"\n            - Diffs: {commit['diffs']}" if include_diffs else ""
         report_context += f"""
             - Date: {commit['date']}
             - Author: {commit['author']} 
@@ -241,8 +263,7 @@ def create_progress_report(
             - Message: {commit['message']}
             - Lines Added: {commit['lines_added']}
             - Lines Deleted: {commit['lines_deleted']}
-            - Files Changed: {commit['files_changed']}
-            - Diffs: {commit['diffs']}
+            - Files Changed: {commit['files_changed']}{diffs_line}
         """
 
     # load the correct prompt based on the user input
@@ -274,30 +295,50 @@ def create_progress_report(
         return
 
     # make the LLM call and display the progress
+    request = dict(
+        model="reportr",
+        messages=messages,
+        max_tokens=1500,  # Reduced from 2000 to prevent repetitive output
+        temperature=0.5,  # Reduced from 0.7 for more focused output
+    )
     try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task("Generating AI analysis...", total=None)
-            progress.update(task, description="Generating AI analysis...")
-
-            # ! openai model call
-            response = client.chat.completions.create(
-                model="reportr",
-                messages=messages,
-                max_tokens=1500,  # Reduced from 2000 to prevent repetitive output
-                temperature=0.5,  # Reduced from 0.7 for more focused output
+        if stream:
+            # show the report as it is written; the panel follows once it's done
+            main_report = stream_completion(
+                client,
+                lambda text: console.print(text, end="", markup=False, highlight=False),
+                **request,
             )
-
-            # capture the response from the LLM
-            main_report = response.choices[0].message.content
-
-            # Clean up repetitive content
+            console.print("\n")
             main_report = clean_repetitive_content(main_report)
-
-            progress.update(task, description="AI analysis complete!")
+        else:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                console=console,
+            ) as progress:
+                task = progress.add_task("Generating AI analysis...", total=None)
+                progress.update(task, description="Generating AI analysis...")
+
+                # ! openai model call
+                if batch:
+                    main_report = complete_in_batch(
+                        client,
+                        request,
+                        on_poll=lambda job: progress.update(
+                            task, description=f"Waiting for batch job ({job.status})..."
+                        ),
+                    )
+                else:
+                    response = client.chat.completions.create(**request)
+
+                    # capture the response from the LLM
+                    main_report = response.choices[0].message.content
+
+                # Clean up repetitive content
+                main_report = clean_repetitive_content(main_report)
+
+                progress.update(task, description="AI analysis complete!")
     except Exception as e:
         console.print(f"[red]Error generating AI analysis: {e}[/red]")
         return
@@ -1,110 +1,25 @@
 import os
 import json
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-from rich.console import Console
+import functools
 from rich.tree import Tree
 from rich.progress import Progress, SpinnerColumn, TextColumn
+from functions.cache import files_fingerprint, read_cached_text, write_cached_text
+from functions.console import console
+from functions.llm import MAX_CONCURRENT_REQUESTS, run_parallel, submit_batch
+from functions.repo_structure import (
+    SKIP_DIRS,
+    INCLUDED_SUFFIXES,
+    MAX_CONTENT_BYTES,
+    build_repo_structure,
+    read_text,
+)
+from functions.summary_format import format_summary_lines
 
 
-def build_repo_structure(repo_path):
-    """
-    Build a nested dictionary structure representing the repository.
-
-    Args:
-        repo_path: Path to the repository
-
-    Returns:
-        dict: Nested dictionary with folder names as keys and lists of file dictionaries as values
-    """
-    SKIP_DIRS = {"venv", ".git", "__pycache__", "node_modules", "dist", "build"}
-    INCLUDED_EXTENSIONS = {
-        ".py",
-        ".md",
-        ".txt",
-        ".json",
-        ".js",
-        ".jsx",
-        ".ts",
-        ".tsx",
-        ".cs",
-        ".rs",
-        ".go",
-        ".java",
-        ".php",
-        ".rb",
-        ".swift",
-        ".kt",
-        ".cpp",
-        ".c",
-        ".h",
-        ".hpp",
-        ".sh",
-        ".bat",
-        ".yml",
-        ".yaml",
-        ".xml",
-        ".html",
-        ".css",
-        ".scss",
-        ".less",
-        ".sass",
-        ".sql",
-        ".csv",
-        ".tsv",
-        ".jsonl",
-    }
-
-    def _build_structure(path):
-        repo_content = {}
-
-        for item in sorted(os.listdir(path)):
-            full_path = os.path.join(path, item)
-
-            if os.path.isdir(full_path):
-                if item in SKIP_DIRS or item.startswith("."):
-                    continue
-                # recursively build structure for subdirectories
-                subfolder_content = _build_structure(full_path)
-                repo_content[item] = {"type": "folder", "contents": subfolder_content}
-            elif os.path.isfile(full_path):
-                # only include files with specified extensions
-                if os.path.splitext(item)[1] in INCLUDED_EXTENSIONS:
-                    try:
-                        with open(full_path, "r", encoding="utf-8") as file:
-                            content = file.read()
-                        repo_content[item] = {"type": "file", "content": content}
-                    except Exception as e:
-                        repo_content[item] = {
-                            "type": "file",
-                            "content": f"# Error reading file: {e}",
-                        }
-
-        return repo_content
-
-    return _build_structure(repo_path)
-
-
-def format_markdown_text(text):
-    """
-    Format markdown-style text with Rich markup for **bold** and `code` elements.
-
-    Args:
-        text: Text that may contain **bold** or `code` markdown
-
-    Returns:
-        str: Text with Rich markup applied
-    """
-    import re
-
-    # Replace **bold text** with Rich bold markup in bright white
-    text = re.sub(r"\*\*(.*?)\*\*", r"[bold bright_white]\1[/bold bright_white]", text)
-
-    # Replace `code text` with Rich markup, but only if properly closed
-    # This prevents issues with unclosed backticks causing everything to be treated as code
-    text = re.sub(r"`([^`\n]+)`", r"[cornsilk1]\1[/cornsilk1]", text)
-
-    return text
+# File types whose contents are sent to the model for directory summaries
+SUMMARY_SUFFIXES = (".py", ".md", ".txt")
+# Total file content sent to the model for a single directory
+MAX_DIRECTORY_CONTENT_BYTES = 256 * 1024
 
 
 # Repository size limits to prevent excessive costs
@@ -123,43 +38,6 @@ def validate_repo_size(repo_path):
     Returns:
         tuple: (is_valid, message, stats)
     """
-    SKIP_DIRS = {"venv", ".git", "__pycache__", "node_modules", "dist", "build"}
-    INCLUDED_EXTENSIONS = {
-        ".py",
-        ".md",
-        ".txt",
-        ".json",
-        ".js",
-        ".jsx",
-        ".ts",
-        ".tsx",
-        ".cs",
-        ".rs",
-        ".go",
-        ".java",
-        ".php",
-        ".rb",
-        ".swift",
-        ".kt",
-        ".cpp",
-        ".c",
-        ".h",
-        ".hpp",
-        ".sh",
-        ".bat",
-        ".yml",
-        ".yaml",
-        ".xml",
-        ".html",
-        ".css",
-        ".scss",
-        ".less",
-        ".sass",
-        ".sql",
-        ".csv",
-        ".tsv",
-        ".jsonl",
-    }
 
     total_files = 0
     total_size = 0
@@ -167,10 +45,10 @@ def validate_repo_size(repo_path):
 
     for root, dirs, files in os.walk(repo_path):
         # Skip irrelevant directories
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+        dirs[:] = [d for d in dirs if not (d in SKIP_DIRS or d[0] == ".")]
 
         for file in files:
-            if os.path.splitext(file)[1] in INCLUDED_EXTENSIONS:
+            if file.endswith(INCLUDED_SUFFIXES):
                 file_path = os.path.join(root, file)
                 try:
                     file_size = os.path.getsize(file_path)
@@ -216,11 +94,22 @@ def validate_repo_size(repo_path):
     )
 
 
+@functools.lru_cache(maxsize=None)
+def _read_prompt(filename):
+    """
+    Read and parse a prompt file next to this module once per process.
+
+    Messages are returned as tuples of items so the cached value can't be
+    modified; callers build fresh dicts from them.
+    """
+    prompt_path = os.path.join(os.path.dirname(__file__), filename)
+    with open(prompt_path, "r", encoding="utf-8") as f:
+        return tuple(tuple(message.items()) for message in json.load(f))
+
+
 # Load prompt template from prompt.txt and inject file contents
 def load_prompt_template(path, file_contents):
-    prompt_path = os.path.join(os.path.dirname(__file__), "prompt.txt")
-    with open(prompt_path, "r", encoding="utf-8") as f:
-        prompt_template = json.load(f)
+    prompt_template = [dict(message) for message in _read_prompt("prompt.txt")]
 
     # Replace placeholders
     for message in prompt_template:
@@ -233,67 +122,470 @@ def load_prompt_template(path, file_contents):
     return prompt_template
 
 
-# Walk the repo and collect relevant files by directory
-def collect_relevant_files(repo_path):
+# Load prompt template from batch_prompt.txt and inject several directories at once
+def load_batch_prompt_template(directories):
+    prompt_template = [dict(message) for message in _read_prompt("batch_prompt.txt")]
+
+    # Replace placeholders
+    for message in prompt_template:
+        if "{directories}" in message["content"]:
+            message["content"] = message["content"].replace(
+                "{directories}", directories
+            )
+    return prompt_template
+
+
+def walk_repo(repo_path):
+    """
+    Walk the repository once, top-down, in sorted order.
+
+    Skipped and hidden directories are pruned in place before os.walk
+    descends, so their contents are never listed or stat'd.
+
+    Args:
+        repo_path: Path to the repository
+
+    Yields:
+        tuple: (root, dirnames, filenames) with both name lists sorted
+    """
+    for root, dirs, files in os.walk(repo_path, topdown=True):
+        dirs[:] = sorted(d for d in dirs if not (d in SKIP_DIRS or d[0] == "."))
+        yield root, dirs, sorted(files)
+
+
+def scan_repo(repo_path):
+    """
+    Collect the directory tree and the files to summarize in a single walk.
+
+    File contents are not read here; read_directory_files reads them only
+    when the request for their directory is built.
+
+    Args:
+        repo_path: Path to the repository
+
+    Returns:
+        tuple: (structure, directory_map) where structure has the same shape as
+            build_repo_structure without file contents, and directory_map maps
+            each directory path to the files to summarize in it
+    """
+    structure = {}
+    folders = {repo_path: structure}
     directory_map = {}
-    SKIP_DIRS = {"venv", ".git", "__pycache__"}
-    INCLUDED_EXTENSIONS = {".py", ".md", ".txt"}
 
-    for root, dirs, files in os.walk(repo_path):
-        # Skip hidden and irrelevant directories
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
-        relevant_files = [
-            f for f in files if os.path.splitext(f)[1] in INCLUDED_EXTENSIONS
-        ]
+    for root, dirnames, filenames in walk_repo(repo_path):
+        contents = folders.pop(root)
+        for name in dirnames:
+            subfolder_content = {}
+            contents[name] = {"type": "folder", "contents": subfolder_content}
+            folders[os.path.join(root, name)] = subfolder_content
+        for name in filenames:
+            if name.endswith(INCLUDED_SUFFIXES):
+                contents[name] = {"type": "file"}
+
+        relevant_files = [f for f in filenames if f.endswith(SUMMARY_SUFFIXES)]
         if relevant_files:
             directory_map[root] = relevant_files
-    return directory_map
+
+    return structure, directory_map
+
+
+# Directories estimated below this many tokens are grouped into shared requests
+SMALL_DIRECTORY_TOKENS = 2000
+# Estimated input token budget for one grouped request
+BATCH_TOKEN_BUDGET = 8000
 
 
-# Summarize a directory using the model
-def summarize_directory(path, files, client):
-    file_contents = ""
+def estimate_directory_tokens(path, files):
+    """
+    Estimate the prompt tokens a directory will cost from its file sizes.
+
+    Uses the usual rough ratio of 4 bytes per token so no file has to be read.
+    """
+    total_bytes = 0
     for file in files:
-        file_path = os.path.join(path, file)
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            file_contents += f"\n\nFile: {file}\n{content}"
+            file_size = os.path.getsize(os.path.join(path, file))
+        except OSError:
+            continue
+        # only the truncated prefix of a large file is ever sent
+        total_bytes += min(file_size, MAX_CONTENT_BYTES)
+    return min(total_bytes, MAX_DIRECTORY_CONTENT_BYTES) // 4
+
+
+def group_directories(directory_map, token_budget=BATCH_TOKEN_BUDGET):
+    """
+    Greedily pack small directories into groups that fit in one request.
+
+    Directories above SMALL_DIRECTORY_TOKENS always get a group of their own.
+
+    Args:
+        directory_map: Mapping of directory path to its relevant files
+        token_budget: Estimated input tokens allowed per grouped request
+
+    Returns:
+        list: Groups, each a list of (path, files) tuples
+    """
+    groups = []
+    current_group = []
+    current_tokens = 0
+
+    for path, files in directory_map.items():
+        tokens = estimate_directory_tokens(path, files)
+        if tokens > SMALL_DIRECTORY_TOKENS:
+            groups.append([(path, files)])
+            continue
+
+        if current_group and current_tokens + tokens > token_budget:
+            groups.append(current_group)
+            current_group = []
+            current_tokens = 0
+
+        current_group.append((path, files))
+        current_tokens += tokens
+
+    if current_group:
+        groups.append(current_group)
+    return groups
+
+
+def read_directory_files(path, files):
+    """
+    Read the given files of a directory into one labelled block of text.
+
+    Each file is cut off at MAX_CONTENT_BYTES, and once the directory has used
+    up MAX_DIRECTORY_CONTENT_BYTES the remaining files are listed by name only.
+    """
+    # collect the pieces and join once, repeated += would copy the text so far
+    # for every file
+    parts = []
+    total_size = 0
+    for file in files:
+        if total_size >= MAX_DIRECTORY_CONTENT_BYTES:
+            parts.append(
+                f"\n\nFile: {file}\n# Skipped: directory content limit reached"
+            )
+            continue
+        content = read_text(os.path.join(path, file))
+        total_size += len(content)
+        parts.append(f"\n\nFile: {file}\n{content}")
+    return "".join(parts)
+
+
+def parse_group_summaries(text):
+    """Parse the JSON object of per-directory summaries returned for a group."""
+    text = text.strip()
+    # Tolerate the model wrapping its answer in a code fence anyway
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    summaries = json.loads(text)
+    if not isinstance(summaries, dict):
+        raise ValueError("expected a JSON object of directory summaries")
+    return summaries
+
+
+# Cached summaries are only reused for the same model and prompt version;
+# bump the version whenever prompt.txt or batch_prompt.txt change
+SUMMARY_CACHE_NAMESPACE = "dir-summaries"
+SUMMARY_CACHE_METADATA = {"model": "reportr", "prompt_version": 1}
+
+
+def load_cached_summary(path, files):
+    """Return the cached summary of a directory whose files are unchanged, or None."""
+    key = files_fingerprint(path, files)
+    return read_cached_text(SUMMARY_CACHE_NAMESPACE, key, SUMMARY_CACHE_METADATA)
+
+
+def store_cached_summary(path, files, summary):
+    """Cache a directory summary under the current state of its files."""
+    key = files_fingerprint(path, files)
+    write_cached_text(SUMMARY_CACHE_NAMESPACE, key, summary, SUMMARY_CACHE_METADATA)
+
+
+def directory_summary_request(path, files):
+    """Return the chat completion arguments for one directory's summary."""
+    file_contents = read_directory_files(path, files)
+    return {
+        "model": "reportr",
+        "messages": load_prompt_template(path, file_contents),
+        "max_tokens": 2000,
+        "temperature": 0.7,
+    }
+
+
+def group_summaries_request(directories):
+    """Return the chat completion arguments for several directories' summaries."""
+    sections = [
+        f"📁 {path}{read_directory_files(path, files)}" for path, files in directories
+    ]
+    return {
+        "model": "reportr",
+        "messages": load_batch_prompt_template("\n\n".join(sections)),
+        "max_tokens": 4000,
+        "temperature": 0.7,
+    }
+
+
+def request_directory_summary(path, files, client):
+    """Ask the model for one directory's summary. Errors propagate to the caller."""
+    response = client.chat.completions.create(
+        **directory_summary_request(path, files)
+    )
+    return response.choices[0].message.content
+
+
+def request_group_summaries(directories, client):
+    """Ask the model for several directories' summaries as one JSON object."""
+    response = client.chat.completions.create(**group_summaries_request(directories))
+    return parse_group_summaries(response.choices[0].message.content)
+
+
+# Summarize a group of directories with a single model call
+def summarize_directory_group(directories, client, console=console):
+    """
+    Summarize one group of directories without any progress display.
+
+    Small directories share one request. Any directory the model leaves out of
+    its JSON answer (or the whole group if the answer cannot be parsed) falls
+    back to its own request. Safe to run from worker threads.
+
+    Args:
+        directories: List of (path, files) tuples
+        client: Azure OpenAI client instance
+        console: Rich console for error messages (default: the shared console)
+
+    Returns:
+        dict: Mapping of directory path to its summary
+    """
+    summaries = {}
+    if len(directories) > 1:
+        try:
+            summaries = request_group_summaries(directories, client)
         except Exception as e:
-            file_contents += f"\n\nFile: {file}\n# Error reading file: {e}"
-
-    messages = load_prompt_template(path, file_contents)
-
-    console = Console()
-    try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task("Generating AI analysis...", total=None)
-            progress.update(
-                task, description=f"Analyzing directory: {os.path.basename(path)}..."
+            console.print(
+                f"[yellow]Grouped analysis failed, summarizing directories one by one: {e}[/yellow]"
             )
-            response = client.chat.completions.create(
-                model="reportr", messages=messages, max_tokens=2000, temperature=0.7
+
+    return complete_group_summaries(directories, summaries, client, console)
+
+
+def complete_group_summaries(directories, summaries, client, console):
+    """
+    Fill in and cache the summaries of one group of directories.
+
+    Any directory without a usable summary in summaries gets its own request.
+
+    Args:
+        directories: List of (path, files) tuples
+        summaries: Mapping of directory path to the summary received so far
+        client: Azure OpenAI client instance
+        console: Rich console for error messages
+
+    Returns:
+        dict: Mapping of directory path to its summary
+    """
+    results = {}
+    for path, files in directories:
+        summary = summaries.get(path)
+        if not isinstance(summary, str) or not summary.strip():
+            try:
+                summary = request_directory_summary(path, files, client)
+            except Exception as e:
+                console.print(
+                    f"[red]Error generating AI analysis for {path}: {e}[/red]"
+                )
+                results[path] = f"Error: Could not analyze directory {path}"
+                continue
+        results[path] = summary
+        store_cached_summary(path, files, summary)
+    return results
+
+
+def summarize_groups_batch(groups, client, console, on_poll=None):
+    """
+    Summarize every group of directories through one Batch API job.
+
+    Directories the job does not answer, e.g. because it expired or a grouped
+    answer could not be parsed, fall back to regular concurrent requests.
+
+    Args:
+        groups: List of directory groups, each a list of (path, files) tuples
+        client: Azure OpenAI client instance
+        console: Rich console for error messages
+        on_poll: Optional callback receiving the batch job after each status check
+
+    Returns:
+        list: Mapping of directory path to summary for each group, in order
+    """
+    requests = [
+        directory_summary_request(*group[0])
+        if len(group) == 1
+        else group_summaries_request(group)
+        for group in groups
+    ]
+    replies = submit_batch(client, requests, on_poll=on_poll)
+
+    received = []
+    for group, reply in zip(groups, replies):
+        summaries = {}
+        if reply is not None:
+            if len(group) == 1:
+                summaries = {group[0][0]: reply}
+            else:
+                try:
+                    summaries = parse_group_summaries(reply)
+                except Exception as e:
+                    console.print(
+                        f"[yellow]Grouped analysis failed, summarizing directories one by one: {e}[/yellow]"
+                    )
+        received.append((group, summaries))
+
+    return run_parallel(
+        lambda item: complete_group_summaries(item[0], item[1], client, console),
+        received,
+        max_concurrency=MAX_CONCURRENT_REQUESTS,
+    )
+
+
+def summarize_directories(directory_map, client, use_cache=True, batch=False):
+    """
+    Summarize every directory in directory_map with concurrent model requests.
+
+    Directories whose files are unchanged since a previous run are served from
+    the on-disk summary cache and are not sent to the model.
+
+    Args:
+        directory_map: Mapping of directory path to its relevant files
+        client: Azure OpenAI client instance
+        use_cache: Whether to reuse cached summaries (default: True)
+        batch: Whether to send the requests as one Batch API job instead of
+            concurrent requests (default: False)
+
+    Returns:
+        dict: Mapping of directory path to its summary
+    """
+    summaries = {}
+    if use_cache:
+        for path, files in directory_map.items():
+            cached = load_cached_summary(path, files)
+            if cached is not None:
+                summaries[path] = cached
+
+    pending = {
+        path: files for path, files in directory_map.items() if path not in summaries
+    }
+    if not pending:
+        return summaries
+
+    groups = group_directories(pending)
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    ) as progress:
+        task = progress.add_task(
+            f"Analyzing {len(pending)} directories...", total=len(groups)
+        )
+        if batch:
+
+            def on_poll(job):
+                counts = job.request_counts
+                done = f"{counts.completed}/{counts.total} requests" if counts else ""
+                progress.update(
+                    task, description=f"Waiting for batch job ({job.status}) {done}"
+                )
+
+            results = summarize_groups_batch(groups, client, console, on_poll)
+        else:
+            results = run_parallel(
+                functools.partial(
+                    summarize_directory_group, client=client, console=console
+                ),
+                groups,
+                max_concurrency=MAX_CONCURRENT_REQUESTS,
+                on_done=functools.partial(progress.advance, task),
             )
-            main_report = response.choices[0].message.content
-            progress.update(task, description="Directory analysis complete!")
-            return main_report
-    except Exception as e:
-        console.print(f"[red]Error generating AI analysis for {path}: {e}[/red]")
-        return f"Error: Could not analyze directory {path}"
+        progress.update(task, description="Directory analysis complete!")
+
+    for group_summaries in results:
+        summaries.update(group_summaries)
+    return summaries
+
+
+# Text tree connectors: branch/last-branch before an item, and the
+# continuation drawn under a folder for its children
+TREE_BRANCH = "├── "
+TREE_LAST_BRANCH = "└── "
+TREE_PIPE = "│   "
+TREE_SPACE = "    "
+
+
+def _tree_frames(structure, prefix):
+    """
+    Build the stack frames for one folder level of the text tree.
+
+    Frames are returned in reverse sorted order so that popping them off a
+    stack yields the items alphabetically.
+    """
+    items = sorted(structure.items())
+    last_index = len(items) - 1
+    return [
+        (name, content, prefix, i == last_index)
+        for i, (name, content) in reversed(list(enumerate(items)))
+    ]
+
+
+def build_text_tree(structure):
+    """
+    Render a repository structure as text tree lines with Rich markup.
+
+    Uses an explicit stack instead of recursion so deep trees don't pay a
+    Python frame per folder or hit the recursion limit.
+
+    Args:
+        structure: Nested dictionary from build_repo_structure
+
+    Returns:
+        list: Tree lines in display order
+    """
+    tree_output = []
+    stack = _tree_frames(structure, "")
+
+    while stack:
+        name, content, prefix, is_last_item = stack.pop()
+        if not isinstance(content, dict):
+            continue
+
+        # Choose the appropriate tree character; each line is built by one
+        # f-string instead of concatenating the prefix first
+        branch = TREE_LAST_BRANCH if is_last_item else TREE_BRANCH
+
+        kind = content.get("type")
+        if kind == "file":
+            # This is a file
+            tree_output.append(f"{prefix}{branch}[cornsilk1]{name}[/cornsilk1]")
+        elif kind == "folder":
+            # This is a directory, its children are rendered next and share
+            # the one prefix string built here
+            tree_output.append(f"{prefix}{branch}[bold pink1]{name}/[/bold pink1]")
+            next_prefix = prefix + (TREE_SPACE if is_last_item else TREE_PIPE)
+            stack.extend(_tree_frames(content.get("contents", {}), next_prefix))
+
+    return tree_output
 
 
 # Main function to be called by the client
-def summarize_details(client, repo_path="."):
+def summarize_details(client, repo_path=".", use_cache=True, batch=False):
     """
     Summarize the repository structure and contents.
 
     Args:
         client: Azure OpenAI client instance
         repo_path: Path to the repository (default: current directory)
+        use_cache: Whether to reuse cached directory summaries (default: True)
+        batch: Whether to run the directory summaries as one Batch API job
+            (default: False)
 
     Returns:
         str: Summary of the repository
@@ -305,108 +597,32 @@ def summarize_details(client, repo_path="."):
 
     summary_parts = []
 
+    # One walk gives both the tree and the per-directory file lists
+    repo_structure, directory_map = scan_repo(repo_path)
+
     # Add directory tree using a simple text-based approach
-    repo_structure = build_repo_structure(repo_path)
 
     summary_parts.append("[bold sky_blue1]Directory Tree:[/bold sky_blue1]")
-    tree_output = []
-
-    def build_text_tree(structure, prefix="", is_last=True):
-        items = list(sorted(structure.items()))
-        for i, (name, content) in enumerate(items):
-            is_last_item = i == len(items) - 1
-
-            # Choose the appropriate tree character
-            if prefix == "":
-                # Root level
-                current_prefix = "├── " if not is_last_item else "└── "
-                next_prefix = "│   " if not is_last_item else "    "
-            else:
-                current_prefix = prefix + ("├── " if not is_last_item else "└── ")
-                next_prefix = prefix + ("│   " if not is_last_item else "    ")
-
-            if isinstance(content, dict) and content.get("type") == "file":
-                # This is a file
-                tree_output.append(f"{current_prefix}[cornsilk1]{name}[/cornsilk1]")
-            elif isinstance(content, dict) and content.get("type") == "folder":
-                # This is a directory
-
-                tree_output.append(f"{current_prefix}[bold pink1]{name}/[/bold pink1]")
-                build_text_tree(content.get("contents", {}), next_prefix, is_last_item)
-
-    build_text_tree(repo_structure)
-    summary_parts.append("\n".join(tree_output))
+    summary_parts.append("\n".join(build_text_tree(repo_structure)))
 
     # Add summaries for each directory
     summary_parts.append("\n[bold plum2]Directory Summaries:[/bold plum2]")
-    directory_map = collect_relevant_files(repo_path)
+
+    # Small directories share a request and all requests run concurrently,
+    # so fetch every summary up front and format them in directory order
+    summaries = summarize_directories(
+        directory_map, client, use_cache=use_cache, batch=batch
+    )
 
     for path, files in directory_map.items():
         # Add directory header - don't decorate the path value
         summary_parts.append(f"\n[bold sky_blue1]Directory:[/bold sky_blue1] {path}")
 
         # Get the raw summary
-        summary = summarize_directory(path, files, client)
-
-        # Process each line with proper formatting similar to summarize_entire_directory
-        lines = summary.split("\n")
-        in_numbered_list = False
+        summary = summaries[path]
 
-        for line in lines:
-            original_line = line
-            line = line.strip()
-
-            if not line:
-                summary_parts.append("")
-                in_numbered_list = False
-                continue
-
-            # Check for markdown headers (## Section Name)
-            if line.startswith("## "):
-                header_text = line[3:].strip()
-                formatted_line = format_markdown_text(header_text)
-                summary_parts.append(f"\n[bold green]{formatted_line}[/bold green]")
-                in_numbered_list = False
-            # Handle numbered lists
-            elif line.startswith(
-                ("1. ", "2. ", "3. ", "4. ", "5. ", "6. ", "7. ", "8. ", "9. ")
-            ):
-                space_index = line.find(" ")
-                number_part = line[: space_index + 1]
-                text_content = line[space_index + 1 :].strip()
-                formatted_line = format_markdown_text(text_content)
-                summary_parts.append(
-                    f"    [bold cyan]{number_part}[/bold cyan][white]{formatted_line}[/white]"
-                )
-                in_numbered_list = True
-            # Handle bullet points
-            elif line.startswith("- "):
-                text_content = line[2:].strip()
-                formatted_line = format_markdown_text(text_content)
-                if in_numbered_list:
-                    summary_parts.append(f"        ◦ [white]{formatted_line}[/white]")
-                else:
-                    summary_parts.append(f"    • [white]{formatted_line}[/white]")
-            # Handle continuation text under numbered items
-            elif in_numbered_list and (
-                original_line.startswith("  ")
-                or original_line.startswith("\t")
-                or line.startswith("◦")
-            ):
-                formatted_line = format_markdown_text(line)
-                if line.startswith("◦"):
-                    summary_parts.append(f"        [white]{formatted_line}[/white]")
-                else:
-                    summary_parts.append(f"        ◦ [white]{formatted_line}[/white]")
-            # Regular text
-            else:
-                formatted_line = format_markdown_text(line)
-                # Ensure all text has proper color formatting
-                if formatted_line and not formatted_line.startswith("["):
-                    summary_parts.append(f"[white]{formatted_line}[/white]")
-                else:
-                    summary_parts.append(formatted_line)
-                in_numbered_list = False
+        # Format each line the same way summarize_overview does
+        summary_parts.extend(format_summary_lines(summary, "bold cyan"))
 
         # Add spacing between directories
         summary_parts.append("")
@@ -423,8 +639,8 @@ def print_tree(root_path, prefix=""):
         root_path: Path to the repository root
         prefix: Indentation prefix for tree display (unused with Rich)
     """
-    console = Console()
-    repo_structure = build_repo_structure(root_path)
+    # the tree only shows names, so skip reading any file contents
+    repo_structure = build_repo_structure(root_path, include_content=False)
 
     # Create Rich tree structure
     tree = Tree(
@@ -432,15 +648,19 @@ def print_tree(root_path, prefix=""):
         style="bold blue",
     )
 
-    def build_rich_tree(structure, parent_node):
+    # Fill the Rich tree with an explicit stack of (structure, parent node) pairs
+    stack = [(repo_structure, tree)]
+    while stack:
+        structure, parent_node = stack.pop()
         for name, content in sorted(structure.items()):
-            if isinstance(content, dict) and content.get("type") == "file":
+            # look the node type up once per entry
+            kind = content.get("type") if isinstance(content, dict) else None
+            if kind == "file":
                 # This is a file - green color
                 parent_node.add(f"[cornsilk1]{name}[/cornsilk1]")
-            elif isinstance(content, dict) and content.get("type") == "folder":
+            elif kind == "folder":
                 # This is a directory - yellow color with slash
                 folder_node = parent_node.add(f"[bold pink1]{name}/[/bold pink1]")
-                build_rich_tree(content.get("contents", {}), folder_node)
+                stack.append((content.get("contents", {}), folder_node))
 
-    build_rich_tree(repo_structure, tree)
     console.print(tree)
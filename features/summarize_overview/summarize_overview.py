@@ -1,116 +1,50 @@
 import os
 import json
-from rich.console import Console
+from collections import Counter
 from rich.progress import Progress, SpinnerColumn, TextColumn
+from functions import repo_structure as shared_repo_structure
+from functions.repo_structure import SKIP_DIRS, INCLUDED_SUFFIXES
+from functions.summary_format import format_summary_lines
+from functions.llm import complete_in_batch, stream_completion
+from functions.cache import repo_state_key, read_cached_text, write_cached_text
+from functions.console import console
 
 
-def build_repo_structure(repo_path):
-    """
-    Build a nested dictionary structure representing the repository.
-
-    Args:
-        repo_path: Path to the repository
-
-    Returns:
-        dict: Nested dictionary with folder names as keys and lists of file dictionaries as values
-    """
-    SKIP_DIRS = {"venv", ".git", "__pycache__", "node_modules", "dist", "build"}
-    INCLUDED_EXTENSIONS = {
-        ".py",
-        ".md",
-        ".txt",
-        ".json",
-        ".js",
-        ".jsx",
-        ".ts",
-        ".tsx",
-        ".cs",
-        ".rs",
-        ".go",
-        ".java",
-        ".php",
-        ".rb",
-        ".swift",
-        ".kt",
-        ".cpp",
-        ".c",
-        ".h",
-        ".hpp",
-        ".sh",
-        ".bat",
-        ".yml",
-        ".yaml",
-        ".xml",
-        ".html",
-        ".css",
-        ".scss",
-        ".less",
-        ".sass",
-        ".sql",
-        ".csv",
-        ".tsv",
-        ".jsonl",
-    }
-
-    def _build_structure(path):
-        repo_content = {}
-
-        for item in sorted(os.listdir(path)):
-            full_path = os.path.join(path, item)
-
-            if os.path.isdir(full_path):
-                if item in SKIP_DIRS or item.startswith("."):
-                    continue
-                # recursively build structure for subdirectories
-                subfolder_content = _build_structure(full_path)
-                repo_content[item] = {"type": "folder", "contents": subfolder_content}
-            elif os.path.isfile(full_path):
-                # Skip files larger than the size threshold and only include files with specified extensions
-                if os.path.splitext(item)[1] in INCLUDED_EXTENSIONS:
-                    try:
-                        file_size = os.path.getsize(full_path)
-                        # Skip files that are too large to prevent memory issues and excessive API costs
-                        if file_size > MAX_SINGLE_FILE_SIZE_KB * 1024:
-                            repo_content[item] = {
-                                "type": "file", 
-                                "content": f"# File too large ({file_size / 1024:.1f}KB) - skipped for analysis"
-                            }
-                            continue
-                        
-                        with open(full_path, "r", encoding="utf-8") as file:
-                            content = file.read()
-                        repo_content[item] = {"type": "file", "content": content}
-                    except Exception as e:
-                        repo_content[item] = {
-                            "type": "file",
-                            "content": f"# Error reading file: {e}",
-                        }
-
-        return repo_content
+# The overview only needs the start of each code file to see what it does
+HEAD_LINES = 40
+# Documentation is worth its tokens, so it is always sent in full
+FULL_CONTENT_SUFFIXES = (".md", ".txt")
 
-    return _build_structure(repo_path)
+# Summaries are cached per commit and working tree state
+OVERVIEW_CACHE_NAMESPACE = "overview-summaries"
+OVERVIEW_CACHE_METADATA = {"model": "reportr", "prompt_version": 1}
 
 
-def format_markdown_text(text):
+def build_repo_structure(repo_path, include_data=False, full_content=False):
     """
-    Format markdown-style text with Rich markup for **bold** and `code` elements.
+    Build a nested dictionary structure representing the repository.
+
+    Files over MAX_SINGLE_FILE_SIZE_KB are listed without their contents, and
+    unless full_content is set only the first HEAD_LINES lines of each file are
+    included (documentation files are always included in full).
 
     Args:
-        text: Text that may contain **bold** or `code` markdown
+        repo_path: Path to the repository
+        include_data: Whether to read the contents of data files such as .csv,
+            .tsv and .jsonl (default: False, they are listed without contents)
+        full_content: Whether to include whole files instead of their first
+            lines (default: False)
 
     Returns:
-        str: Text with Rich markup applied
+        dict: Nested dictionary with folder names as keys and lists of file dictionaries as values
     """
-    import re
-
-    # Replace **bold text** with Rich bold markup in bright white
-    text = re.sub(r"\*\*(.*?)\*\*", r"[bold bright_white]\1[/bold bright_white]", text)
-
-    # Replace `code text` with Rich markup, but only if properly closed
-    # This prevents issues with unclosed backticks causing everything to be treated as code
-    text = re.sub(r"`([^`\n]+)`", r"[cornsilk1]\1[/cornsilk1]", text)
-
-    return text
+    return shared_repo_structure.build_repo_structure(
+        repo_path,
+        include_data=include_data,
+        max_file_size=MAX_SINGLE_FILE_SIZE_KB * 1024,
+        head_lines=None if full_content else HEAD_LINES,
+        full_content_suffixes=FULL_CONTENT_SUFFIXES,
+    )
 
 
 # Repository size limits to prevent excessive costs
@@ -129,54 +63,16 @@ def validate_repo_size(repo_path):
     Returns:
         tuple: (is_valid, message, stats)
     """
-    SKIP_DIRS = {"venv", ".git", "__pycache__", "node_modules", "dist", "build"}
-    INCLUDED_EXTENSIONS = {
-        ".py",
-        ".md",
-        ".txt",
-        ".json",
-        ".js",
-        ".jsx",
-        ".ts",
-        ".tsx",
-        ".cs",
-        ".rs",
-        ".go",
-        ".java",
-        ".php",
-        ".rb",
-        ".swift",
-        ".kt",
-        ".cpp",
-        ".c",
-        ".h",
-        ".hpp",
-        ".sh",
-        ".bat",
-        ".yml",
-        ".yaml",
-        ".xml",
-        ".html",
-        ".css",
-        ".scss",
-        ".less",
-        ".sass",
-        ".sql",
-        ".csv",
-        ".tsv",
-        ".jsonl",
-    }
-
     total_files = 0
     total_size = 0
     large_files = []
 
     for root, dirs, files in os.walk(repo_path):
         # Skip irrelevant directories
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+        dirs[:] = [d for d in dirs if not (d in SKIP_DIRS or d[0] == ".")]
 
         for file in files:
-            if os.path.splitext(file)[1] in INCLUDED_EXTENSIONS:
+            if file.endswith(INCLUDED_SUFFIXES):
                 file_path = os.path.join(root, file)
                 try:
                     file_size = os.path.getsize(file_path)
@@ -242,7 +138,43 @@ def load_prompt_template(structure_json):
     return prompt_template
 
 
-def summarize_overview(client, repo_path="."):
+def collect_stats(structure, stats=None):
+    """
+    Count files, folders and file types of a repository structure in one pass.
+
+    Args:
+        structure: Nested dictionary from build_repo_structure
+        stats: Stats dictionary to update (default: a new one)
+
+    Returns:
+        dict: "files" and "folders" totals and a "file_types" Counter by extension
+    """
+    if stats is None:
+        stats = {"files": 0, "folders": 0, "file_types": Counter()}
+
+    file_types = stats["file_types"]
+    for name, content in structure.items():
+        if not isinstance(content, dict):
+            continue
+        # look the node type up once per entry
+        kind = content.get("type")
+        if kind == "file":
+            stats["files"] += 1
+            file_types[os.path.splitext(name)[1] or "no extension"] += 1
+        elif kind == "folder":
+            stats["folders"] += 1
+            collect_stats(content.get("contents", {}), stats)
+    return stats
+
+
+def summarize_overview(
+    client,
+    repo_path=".",
+    full_content=False,
+    stream=False,
+    use_cache=True,
+    batch=False,
+):
     """
     Summarize the repository using the raw JSON structure as context.
     More efficient for large repositories as it sends the structure directly.
@@ -250,38 +182,76 @@ def summarize_overview(client, repo_path="."):
     Args:
         client: Azure OpenAI client instance
         repo_path: Path to the repository (default: current directory)
+        full_content: Whether to send whole code files instead of their first
+            HEAD_LINES lines (default: False)
+        stream: Whether to print the model's reply as it is generated
+            (default: False); the formatted summary is still returned
+        use_cache: Whether to reuse the summary of an earlier run on the same
+            commit with the same uncommitted changes (default: True); without
+            it a new summary is generated and replaces the cached one
+        batch: Whether to send the request as a Batch API job, which is
+            cheaper but can take much longer (default: False)
 
     Returns:
         str: Summary of the repository
     """
+    # An unchanged git working tree gets the same summary without a model call
+    cache_key = repo_state_key(repo_path, repo_path, full_content)
+    if use_cache:
+        cached_summary = read_cached_text(
+            OVERVIEW_CACHE_NAMESPACE, cache_key, OVERVIEW_CACHE_METADATA
+        )
+        if cached_summary is not None:
+            return cached_summary
+
     # Validate repository size first
     is_valid, message, stats = validate_repo_size(repo_path)
     if not is_valid:
         return f"[red]Error: {message}[/red]\n\nRepository stats:\n- Files: {stats['files']}\n- Size: {stats['size_mb']:.1f}MB\n\nConsider using .gitignore patterns or excluding large directories to reduce size."
 
     # Build the complete repository structure
-    repo_structure = build_repo_structure(repo_path)
+    repo_structure = build_repo_structure(repo_path, full_content=full_content)
 
-    # Convert to JSON string
-    structure_json = json.dumps(repo_structure, indent=2, ensure_ascii=False)
+    # Convert to a compact JSON string - the model does not need the
+    # indentation, and dropping it cuts the bytes sent and tokens billed
+    structure_json = json.dumps(
+        repo_structure, separators=(",", ":"), ensure_ascii=False
+    )
 
     # Load prompt template and inject repository structure
     messages = load_prompt_template(structure_json)
 
-    console = Console()
+    request = dict(model="reportr", messages=messages, max_tokens=2000, temperature=0.7)
     try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task("Generating AI analysis...", total=None)
-            progress.update(task, description="Generating full directory analysis...")
-            response = client.chat.completions.create(
-                model="reportr", messages=messages, max_tokens=2000, temperature=0.7
+        if stream:
+            raw_summary = stream_completion(
+                client,
+                lambda text: console.print(text, end="", markup=False, highlight=False),
+                **request,
             )
-            raw_summary = response.choices[0].message.content
-            progress.update(task, description="Full directory analysis complete!")
+            console.print()
+        else:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                console=console,
+            ) as progress:
+                task = progress.add_task("Generating AI analysis...", total=None)
+                progress.update(
+                    task, description="Generating full directory analysis..."
+                )
+                if batch:
+                    raw_summary = complete_in_batch(
+                        client,
+                        request,
+                        on_poll=lambda job: progress.update(
+                            task, description=f"Waiting for batch job ({job.status})..."
+                        ),
+                    )
+                else:
+                    response = client.chat.completions.create(**request)
+                    raw_summary = response.choices[0].message.content
+                progress.update(task, description="Full directory analysis complete!")
     except Exception as e:
         console.print(f"[red]Error generating AI analysis: {e}[/red]")
         return f"Error: Could not analyze repository"
@@ -303,123 +273,25 @@ def summarize_overview(client, repo_path="."):
     # Add the main summary - use plain text with some basic formatting instead of full markdown
     formatted_parts.append("[bold sky_blue1]Detailed Analysis:[/bold sky_blue1]")
     # Process the summary with simplified, consistent formatting
-    lines = raw_summary.split("\n")
-    processed_lines = []
-    in_numbered_list = False
-    current_list_number = 0
-
-    for line in lines:
-        original_line = line
-        line = line.strip()
-
-        if not line:
-            processed_lines.append("")
-            in_numbered_list = False
-            current_list_number = 0
-            continue
-
-        # Check for markdown headers (## Section Name) - these are our main section headers
-        if line.startswith("## "):
-            # Remove the markdown symbols and format as a main header
-            header_text = line[3:].strip()
-            formatted_line = format_markdown_text(header_text)
-            processed_lines.append(f"\n[bold green]{formatted_line}[/bold green]")
-            in_numbered_list = False
-            current_list_number = 0
-        # Handle numbered lists (lines starting with numbers)
-        elif line.startswith(
-            ("1. ", "2. ", "3. ", "4. ", "5. ", "6. ", "7. ", "8. ", "9. ")
-        ):
-            # Find the number and get the rest
-            space_index = line.find(" ")
-            number_part = line[: space_index + 1]
-            text_content = line[space_index + 1 :].strip()
-            formatted_line = format_markdown_text(text_content)
-            processed_lines.append(
-                f"    [bold bright_white]{number_part}[/bold bright_white][white]{formatted_line}[/white]"
-            )
-            in_numbered_list = True
-            current_list_number = int(number_part.replace(".", "").strip())
-        # Color code bullet points (lines starting with -)
-        elif line.startswith("- "):
-            # Remove the dash and get the text
-            text_content = line[2:].strip()
-            formatted_line = format_markdown_text(text_content)
-            if in_numbered_list:
-                # This is a sub-bullet under a numbered item - use white, not bright_black
-                processed_lines.append(f"        ◦ [white]{formatted_line}[/white]")
-            else:
-                # This is a top-level bullet
-                processed_lines.append(f"    • [white]{formatted_line}[/white]")
-        # Check if this line looks like it should be indented under a numbered item
-        elif in_numbered_list and (
-            original_line.startswith("  ")
-            or original_line.startswith("\t")
-            or line.startswith("◦")
-        ):
-            # This is continuation text under a numbered item
-            formatted_line = format_markdown_text(line)
-            if line.startswith("◦"):
-                # Already has bullet point
-                processed_lines.append(f"        [white]{formatted_line}[/white]")
-            else:
-                # Add bullet point
-                processed_lines.append(f"        ◦ [white]{formatted_line}[/white]")
-        # Regular text - keep as is but format markdown
-        else:
-            formatted_line = format_markdown_text(line)
-            # Make sure all regular text is properly colored (not greyed out)
-            if formatted_line and not formatted_line.startswith("["):
-                # Add white color if no color formatting is already present
-                processed_lines.append(f"[white]{formatted_line}[/white]")
-            else:
-                processed_lines.append(formatted_line)
-            in_numbered_list = False
-            current_list_number = 0
-
-    # Join the processed lines and add to formatted parts
+    processed_lines = format_summary_lines(raw_summary, "bold bright_white")
     formatted_parts.append("\n".join(processed_lines))
 
     # Add some repository statistics
     formatted_parts.append("\n[bold sky_blue1]Directory Statistics:[/bold sky_blue1]")
 
-    # Count files and folders
-    def count_items(structure):
-        files = 0
-        folders = 0
-        for name, content in structure.items():
-            if isinstance(content, dict):
-                if content.get("type") == "file":
-                    files += 1
-                elif content.get("type") == "folder":
-                    folders += 1
-                    sub_files, sub_folders = count_items(content.get("contents", {}))
-                    files += sub_files
-                    folders += sub_folders
-        return files, folders
-
-    total_files, total_folders = count_items(repo_structure)
-    formatted_parts.append(f"├── [green]Total Files:[/green] {total_files}")
-    formatted_parts.append(f"├── [green]Total Directories:[/green] {total_folders}")
-
-    # Count file types
-    file_types = {}
-
-    def count_file_types(structure):
-        for name, content in structure.items():
-            if isinstance(content, dict):
-                if content.get("type") == "file":
-                    ext = os.path.splitext(name)[1] or "no extension"
-                    file_types[ext] = file_types.get(ext, 0) + 1
-                elif content.get("type") == "folder":
-                    count_file_types(content.get("contents", {}))
-
-    count_file_types(repo_structure)
+    # Count files, folders and file types in a single walk of the structure
+    stats = collect_stats(repo_structure)
+    formatted_parts.append(f"├── [green]Total Files:[/green] {stats['files']}")
+    formatted_parts.append(f"├── [green]Total Directories:[/green] {stats['folders']}")
+
+    file_types = stats["file_types"]
     if file_types:
         formatted_parts.append(f"└── [green]File Types:[/green]")
-        for ext, count in sorted(file_types.items(), key=lambda x: x[1], reverse=True)[
-            :5
-        ]:  # Top 5 file types
+        for ext, count in file_types.most_common(5):  # Top 5 file types
             formatted_parts.append(f"    ├── {ext}: {count} files")
 
-    return "\n".join(formatted_parts)
+    summary = "\n".join(formatted_parts)
+    write_cached_text(
+        OVERVIEW_CACHE_NAMESPACE, cache_key, summary, OVERVIEW_CACHE_METADATA
+    )
+    return summary
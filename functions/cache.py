@@ -0,0 +1,182 @@
+import os
+import json
+import pickle
+import hashlib
+
+# All reportr caches live under one directory in the user's cache folder
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "reportr")
+
+
+def files_fingerprint(path, files):
+    """
+    Returns a cache key for a set of files in a directory.
+    Args:
+        path: Directory containing the files
+        files: File names inside path
+    Returns:
+        A hex digest of the path and each file's name, mtime and size, or None
+        if a file could not be stat'ed
+    """
+    entries = []
+    for name in sorted(files):
+        try:
+            stat = os.stat(os.path.join(path, name))
+        except OSError:
+            return None
+        entries.append((name, stat.st_mtime_ns, stat.st_size))
+
+    key = json.dumps([os.path.abspath(path), entries])
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def repo_state_key(repo_path, *parts, exclude=()):
+    """
+    Returns a cache key for the current state of a git working tree.
+    Args:
+        repo_path: Path inside the working tree
+        parts: Extra JSON-serializable values that take part in the key, such
+            as the options a result was generated with
+        exclude: Paths whose changes are left out of the key, such as a file
+            the command itself writes into the working tree
+    Returns:
+        A hex digest of HEAD, the uncommitted changes and parts, or None if
+        repo_path is not in a git repository with at least one commit
+    """
+    try:
+        # imported here so commands that never use this don't load GitPython
+        from git import Repo
+
+        repo = Repo(repo_path, search_parent_directories=True)
+        head = repo.head.commit.hexsha
+        status = repo.git.status("--porcelain", "-z", "--untracked-files=all")
+    except Exception:
+        return None
+
+    # the status alone misses a modified file being edited again, so every
+    # changed or untracked file also contributes its mtime and size
+    excluded = {os.path.realpath(path) for path in exclude}
+    entries = []
+    fields = iter(status.split("\0"))
+    for field in fields:
+        if not field:
+            continue
+        state, name = field[:2], field[3:]
+        if "R" in state or "C" in state:
+            # renames and copies are followed by their original path
+            next(fields, None)
+        path = os.path.join(repo.working_tree_dir, name)
+        if os.path.realpath(path) in excluded:
+            continue
+        try:
+            stat = os.stat(path)
+            entries.append((state, name, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            entries.append((state, name, None, None))
+
+    key = json.dumps([os.path.abspath(repo_path), head, entries, parts])
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def _cache_paths(namespace, key):
+    """Return the value and metadata paths for a cache entry."""
+    directory = os.path.join(CACHE_DIR, namespace)
+    return (
+        os.path.join(directory, f"{key}.md"),
+        os.path.join(directory, f"{key}.json"),
+    )
+
+
+def read_cached_text(namespace, key, metadata):
+    """
+    Returns the cached text for a key, or None on a miss.
+    Args:
+        namespace: Sub-directory of the cache, one per kind of value
+        key: Cache key, e.g. from files_fingerprint
+        metadata: Dict that must match what was stored with the value
+    Returns:
+        The cached string, or None if it is missing, unreadable, or was stored
+        with different metadata (another model or prompt version)
+    """
+    if key is None:
+        return None
+
+    value_path, metadata_path = _cache_paths(namespace, key)
+    try:
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            if json.load(f) != metadata:
+                return None
+        with open(value_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except (OSError, ValueError):
+        return None
+
+
+def write_cached_text(namespace, key, value, metadata):
+    """
+    Stores text and its metadata under a key. Failures are ignored, the cache
+    is only an optimization.
+    Args:
+        namespace: Sub-directory of the cache, one per kind of value
+        key: Cache key, e.g. from files_fingerprint
+        value: The string to store
+        metadata: Dict stored alongside the value and checked on read
+    """
+    if key is None:
+        return
+
+    value_path, metadata_path = _cache_paths(namespace, key)
+    try:
+        os.makedirs(os.path.dirname(value_path), exist_ok=True)
+        if os.path.exists(metadata_path):
+            os.remove(metadata_path)
+        with open(value_path, "w", encoding="utf-8") as f:
+            f.write(value)
+        # metadata goes last so a half-written entry is never treated as a hit
+        with open(metadata_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+    except OSError:
+        pass
+
+
+def read_cached_object(namespace, key):
+    """
+    Returns the cached Python object for a key, or None on a miss.
+    Args:
+        namespace: Sub-directory of the cache, one per kind of value
+        key: Cache key, e.g. from files_fingerprint
+    Returns:
+        The unpickled object, or None if it is missing or unreadable
+    """
+    if key is None:
+        return None
+
+    try:
+        with open(os.path.join(CACHE_DIR, namespace, f"{key}.pkl"), "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # a truncated or outdated pickle is just a miss
+        return None
+
+
+def write_cached_object(namespace, key, value):
+    """
+    Pickles an object under a key. Failures are ignored, the cache is only an
+    optimization.
+    Args:
+        namespace: Sub-directory of the cache, one per kind of value
+        key: Cache key, e.g. from files_fingerprint
+        value: A picklable object
+    """
+    if key is None:
+        return
+
+    path = os.path.join(CACHE_DIR, namespace, f"{key}.pkl")
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # the rename is atomic, so readers never see a half-written pickle
+        os.replace(temp_path, path)
+    except (OSError, pickle.PicklingError):
+        pass
@@ -0,0 +1,5 @@
+from rich.console import Console
+
+# One console for all of reportr's output, shared by every module so the
+# terminal is only set up once and progress displays don't compete for it
+console = Console()
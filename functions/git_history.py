@@ -1,35 +1,96 @@
 from datetime import datetime, timedelta
-from git import Repo
-from rich.console import Console
+from git import NULL_TREE, Repo
 from rich.progress import Progress, SpinnerColumn, TextColumn
+from functions.repo_structure import SKIP_DIRS
+from functions.console import console
 import os
-from collections import defaultdict
+import codecs
+import functools
+import itertools
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
 
-console = Console()
-
-
-def get_commit_diffs_by_file(repo_path=".", commit_hash=None):
+# git log format for one commit: a record separator, then the hash, parent
+# hashes, author name, author email, commit timestamp and raw message,
+# separated by unit separators
+LOG_FORMAT = "%x1e%H%x1f%P%x1f%an%x1f%ae%x1f%ct%x1f%B"
+# Commit categories in priority order with their keywords, matched
+# case-insensitively as substrings ("fixed" counts as a fix)
+COMMIT_TYPE_KEYWORDS = (
+    ("fix", ("fix", "bug", "issue", "error")),
+    ("feature", ("feat", "add", "implement", "new")),
+    ("refactor", ("refactor", "clean", "restructure")),
+    ("docs", ("doc", "readme", "comment")),
+)
+COMMIT_TYPE_RANKS = {
+    commit_type: rank for rank, (commit_type, _) in enumerate(COMMIT_TYPE_KEYWORDS)
+}
+# One pass over the message finds every keyword with its category as the group
+# name. The lookahead tries each position, so keywords overlapping another
+# match (the "error" in "readmerror") are still found
+COMMIT_TYPE_PATTERN = re.compile(
+    "(?=%s)"
+    % "|".join(
+        f"(?P<{commit_type}>{'|'.join(keywords)})"
+        for commit_type, keywords in COMMIT_TYPE_KEYWORDS
+    ),
+    re.IGNORECASE,
+)
+# Day names indexed by struct_time.tm_wday, Monday first
+DAY_NAMES = (
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+# Bytes read from the git log pipe at a time while streaming commits
+LOG_CHUNK_BYTES = 64 * 1024
+# Worker threads used to fetch commit diffs; each one spends its time waiting
+# on a git subprocess, so threads overlap well
+DIFF_WORKERS = max(4, min(32, (os.cpu_count() or 1) * 4))
+
+# Diffs of recently analyzed commits, keyed by commit hash. A hash pins the
+# commit and its parents, so an entry is valid for any clone that has it
+DIFF_CACHE_SIZE = 2048
+_diff_cache = OrderedDict()
+_diff_cache_lock = threading.Lock()
+
+
+def get_commit_diffs_by_file(repo=".", commit_hash=None):
     """
     Returns a dictionary of file diffs for a specific commit.
     Args:
-        repo_path: Path to the Git repository
+        repo: An open GitPython Repo, or the path to the Git repository
         commit_hash: The hash of the commit to analyze
     Returns:
         A dictionary where keys are filenames and values are the diff text
     """
     try:
-        repo = Repo(repo_path)
+        if not isinstance(repo, Repo):
+            repo = Repo(repo)
         commit = repo.commit(commit_hash)
 
+        with _diff_cache_lock:
+            cached = _diff_cache.get(commit.hexsha)
+            if cached is not None:
+                _diff_cache.move_to_end(commit.hexsha)
+                return dict(cached)
+
         diffs = {}
         parent = commit.parents[0] if commit.parents else None
 
         if parent:
             diff_index = parent.diff(commit, create_patch=True)
         else:
-            # Initial commit (no parent)
-            diff_index = commit.diff(None, create_patch=True)
+            # Initial commit (no parent), compared with the empty tree
+            diff_index = commit.diff(NULL_TREE, create_patch=True)
 
         for diff in diff_index:
             if diff.a_path:
@@ -48,27 +109,184 @@ def get_commit_diffs_by_file(repo_path=".", commit_hash=None):
             else:
                 diffs[file_path] = "No diff content available"
 
-        return diffs
+        with _diff_cache_lock:
+            _diff_cache[commit.hexsha] = diffs
+            if len(_diff_cache) > DIFF_CACHE_SIZE:
+                _diff_cache.popitem(last=False)
+
+        # callers get their own copy, the cached one must not change
+        return dict(diffs)
 
     except Exception as e:
         console.print(f"[red]Error getting diffs: {e}[/red]")
         return {}
 
 
+def parse_numstat(numstat_output):
+    """
+    Returns per-file line counts from `git log -z --numstat` output for one commit.
+    Args:
+        numstat_output: The NUL-separated numstat entries of a single commit
+    Returns:
+        A dictionary where keys are filenames (the old name for renames) and
+        values are (lines_added, lines_deleted) tuples
+    """
+    counts = {}
+    fields = iter(numstat_output.split("\0"))
+    for field in fields:
+        field = field.lstrip("\n")
+        if not field:
+            continue
+
+        added, deleted, file_path = field.split("\t", 2)
+        if not file_path:
+            # renames leave the path empty and list the old and new path next
+            file_path = next(fields, "")
+            next(fields, None)
+
+        # binary files are reported as "-" for both counts
+        counts[file_path] = (
+            int(added) if added != "-" else 0,
+            int(deleted) if deleted != "-" else 0,
+        )
+    return counts
+
+
+def get_commit_numstat(repo=".", commit_hash=None):
+    """
+    Returns per-file line counts for a specific commit without building its patch.
+    Args:
+        repo: An open GitPython Repo, or the path to the Git repository
+        commit_hash: The hash of the commit to analyze
+    Returns:
+        A dictionary where keys are filenames and values are
+        (lines_added, lines_deleted) tuples
+    """
+    try:
+        if not isinstance(repo, Repo):
+            repo = Repo(repo)
+        return parse_numstat(
+            repo.git.show(commit_hash, "-z", "--numstat", "-M", "--format=")
+        )
+    except Exception as e:
+        console.print(f"[red]Error getting line counts: {e}[/red]")
+        return {}
+
+
+def parse_log_record(record):
+    """
+    Returns a commit dictionary for one LOG_FORMAT record of `git log -z --numstat`.
+    Args:
+        record: The text of one commit, without its leading record separator
+    Returns:
+        A dictionary with hash, parents, author, email, committed_date,
+        message and numstat keys
+    """
+    header, _, numstat_output = record.partition("\0")
+    hexsha, parents, author, email, committed_date, message = header.split("\x1f", 5)
+    return {
+        "hash": hexsha,
+        "parents": parents.split(),
+        "author": author,
+        "email": email,
+        "committed_date": int(committed_date),
+        "message": message,
+        "numstat": parse_numstat(numstat_output),
+    }
+
+
+def iter_commit_numstats(repo, revision, since=None):
+    """
+    Yields every commit reachable from a revision with its per-file line counts,
+    streaming a single `git log --numstat` call instead of one diff per commit.
+    Only the commit being parsed is held in memory, and stopping early stops git.
+    Args:
+        repo: The GitPython Repo to read from
+        revision: Branch name or other revision to start from
+        since: Optional datetime; older commits are left out
+    Yields:
+        Commit dictionaries, newest first, as returned by parse_log_record
+    Raises:
+        GitCommandError: if git fails, e.g. for an unknown revision
+    """
+    args = [revision, "-z", "--numstat", "-M", f"--format={LOG_FORMAT}"]
+    if since is not None:
+        args.append(f"--since={since}")
+
+    process = repo.git.log(*args, as_process=True)
+    # incremental decoding keeps characters split across chunks intact
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    # pieces of the record that is still being read
+    pending = []
+
+    for chunk in iter(lambda: process.stdout.read(LOG_CHUNK_BYTES), b""):
+        pieces = decoder.decode(chunk).split("\x1e")
+        pending.append(pieces[0])
+        if len(pieces) == 1:
+            continue
+
+        # every separator in the chunk completes the record before it
+        for record in ["".join(pending)] + pieces[1:-1]:
+            if record:
+                yield parse_log_record(record)
+        pending = [pieces[-1]]
+
+    pending.append(decoder.decode(b"", final=True))
+    record = "".join(pending)
+    if record:
+        yield parse_log_record(record)
+
+    # raises if git exited with an error
+    process.wait()
+
+
+def _non_empty(commits):
+    """Return the iterator with its first item put back, or None if it is empty."""
+    first = next(commits, None)
+    if first is None:
+        return None
+    return itertools.chain((first,), commits)
+
+
+@functools.lru_cache(maxsize=8192)
+def file_extension(file_path):
+    """
+    Returns a file's extension, e.g. ".py", or "" if it has none.
+    The same paths recur across commits, so results are cached.
+    """
+    return os.path.splitext(file_path)[1]
+
+
 def analyze_diff_for_lines(diff_content):
     """
     Analyze diff content to count lines added and deleted
+    Args:
+        diff_content: Patch text, as str or as the raw bytes GitPython returns
+    Returns:
+        A (lines_added, lines_deleted) tuple
     """
-    lines_added = 0
-    lines_deleted = 0
+    if not diff_content:
+        return 0, 0
+
+    # Count lines starting with + (added) and - (deleted), leaving out the
+    # +++/--- file headers. str/bytes.count scans in C, so no per-line list is
+    # built; the first line has no newline before it and is checked on its own
+    if isinstance(diff_content, bytes):
+        newline, plus, minus = b"\n", b"+", b"-"
+    else:
+        newline, plus, minus = "\n", "+", "-"
+
+    lines_added = diff_content.count(newline + plus) - diff_content.count(
+        newline + plus * 3
+    )
+    lines_deleted = diff_content.count(newline + minus) - diff_content.count(
+        newline + minus * 3
+    )
 
-    if diff_content:
-        # Count lines starting with + (added) and - (deleted)
-        for line in diff_content.split("\n"):
-            if line.startswith("+") and not line.startswith("+++"):
-                lines_added += 1
-            elif line.startswith("-") and not line.startswith("---"):
-                lines_deleted += 1
+    if diff_content.startswith(plus) and not diff_content.startswith(plus * 3):
+        lines_added += 1
+    elif diff_content.startswith(minus) and not diff_content.startswith(minus * 3):
+        lines_deleted += 1
 
     return lines_added, lines_deleted
 
@@ -77,18 +295,16 @@ def analyze_commit_message(message):
     """
     Categorize commit message to determine commit type
     """
-    message_lower = message.lower()
-
-    if any(word in message_lower for word in ["fix", "bug", "issue", "error"]):
-        return "fix"
-    elif any(word in message_lower for word in ["feat", "add", "implement", "new"]):
-        return "feature"
-    elif any(word in message_lower for word in ["refactor", "clean", "restructure"]):
-        return "refactor"
-    elif any(word in message_lower for word in ["doc", "readme", "comment"]):
-        return "docs"
-    else:
-        return "other"
+    # The highest priority category with a keyword anywhere in the message wins
+    best_type = "other"
+    best_rank = len(COMMIT_TYPE_RANKS)
+    for match in COMMIT_TYPE_PATTERN.finditer(message):
+        rank = COMMIT_TYPE_RANKS[match.lastgroup]
+        if rank < best_rank:
+            best_type, best_rank = match.lastgroup, rank
+            if rank == 0:
+                break
+    return best_type
 
 
 def get_repository_structure(repo_path="."):
@@ -98,9 +314,8 @@ def get_repository_structure(repo_path="."):
     try:
         structure = []
         for root, dirs, files in os.walk(repo_path):
-            # Skip .git directory
-            if ".git" in root:
-                continue
+            # Skip .git, virtualenv and cache directories without entering them
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
 
             # Get relative path
             rel_path = os.path.relpath(root, repo_path)
@@ -109,16 +324,73 @@ def get_repository_structure(repo_path="."):
             else:
                 structure.append(f"{rel_path}/: {len(files)} files")
 
+            # Limit to first 10 entries
+            if len(structure) >= 10:
+                break
+
             # Limit depth to avoid too much detail
-            if len(rel_path.split(os.sep)) > 2:
-                continue
+            if rel_path.count(os.sep) >= 2:
+                dirs[:] = []
 
-        return structure[:10]  # Limit to first 10 entries
+        return structure
     except Exception as e:
         return [f"Error reading structure: {e}"]
 
 
-def get_git_history(repo_path=".", days_back=30, contributor_filter=None, branch=None):
+class ContribStats:
+    """Running totals for one contributor while the history is aggregated."""
+
+    __slots__ = ("commits", "lines_added", "lines_deleted", "files_changed")
+
+    def __init__(self):
+        self.commits = 0
+        self.lines_added = 0
+        self.lines_deleted = 0
+        self.files_changed = 0
+
+    def as_dict(self):
+        """Return the totals in the dictionary form get_git_history returns."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def fetch_commit_diffs(repo_path, commit_records):
+    """
+    Fills in the "diffs" of each commit record, fetching the diffs in parallel.
+    Args:
+        repo_path: Path to the Git repository
+        commit_records: Commit dictionaries with a "hash" key, updated in place
+    """
+    # a Repo keeps persistent git processes that must not be shared between
+    # threads, so each worker opens its own
+    local = threading.local()
+
+    def _fetch(commit_hash):
+        if not hasattr(local, "repo"):
+            local.repo = Repo(repo_path)
+        return get_commit_diffs_by_file(local.repo, commit_hash)
+
+    records_by_hash = {record["hash"]: record for record in commit_records}
+    workers = min(DIFF_WORKERS, len(records_by_hash))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_fetch, commit_hash): commit_hash
+            for commit_hash in records_by_hash
+        }
+        # results are stored from this thread only
+        for future in as_completed(futures):
+            records_by_hash[futures[future]]["diffs"] = future.result()
+
+
+def get_git_history(
+    repo_path=".",
+    days_back=30,
+    contributor_filter=None,
+    branch=None,
+    diff_limit=20,
+    max_commits=None,
+    record_limit=None,
+    keep_diffs=False,
+):
     """
     Extract comprehensive git history information from the repository
     Args:
@@ -126,141 +398,200 @@ def get_git_history(repo_path=".", days_back=30, contributor_filter=None, branch
         days_back: Number of days to look back (0 for all time)
         contributor_filter: Optional list of contributor names to filter by
         branch: Optional branch name to analyze (default: tries main, then master, then all branches)
+        diff_limit: Number of most recent commits to fetch full diffs for when
+            keep_diffs is set; the line counts of every commit come from
+            numstat and need no diff
+        max_commits: Optional cap on the number of commits analyzed; the most
+            recent ones are kept
+        record_limit: Optional number of most recent commits to return full
+            records for in "commits"; all commits still count towards the
+            totals and contributor stats
+        keep_diffs: Whether to fetch the patch text of the most recent commits
+            into their "diffs" (default: False, "diffs" are left empty)
+    Returns:
+        dict: Commit records, contributor stats, line and file totals, and
+        counts of commit types, weekdays, changed files and file types, or
+        None if the repository can't be read
     """
     try:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             console=console,
+            # no spinner thread or redraws when output is piped or in CI
+            disable=not console.is_terminal,
         ) as progress:
             task = progress.add_task("Analyzing git repository...", total=None)
 
             repo = Repo(repo_path)
 
             # get repo commits for the last x days
-            since_date = datetime.now() - timedelta(days=days_back)
+            # (0 days means all time, so no cutoff is passed to git)
+            since_date = (
+                datetime.now() - timedelta(days=days_back) if days_back > 0 else None
+            )
 
             # Use specified branch, or try main/master, or get all commits
             if branch:
                 try:
-                    commits = list(repo.iter_commits(branch, since=since_date))
-                    if not commits:
+                    commits = _non_empty(
+                        iter_commit_numstats(repo, branch, since=since_date)
+                    )
+                    if commits is None:
                         console.print(
                             f"[yellow]Warning: No commits found in branch '{branch}' for the specified time period.[/yellow]"
                         )
+                        commits = ()
                 except Exception as e:
                     console.print(f"[red]Error accessing branch '{branch}': {e}[/red]")
                     return None
             else:
                 # Try main branch first
                 try:
-                    commits = list(repo.iter_commits("main", since=since_date))
+                    commits = _non_empty(
+                        iter_commit_numstats(repo, "main", since=since_date)
+                    )
                 except:
-                    commits = []
+                    commits = None
 
-                if not commits:
+                if commits is None:
                     # If no commits in main, try master branch
                     try:
-                        commits = list(repo.iter_commits("master", since=since_date))
+                        commits = _non_empty(
+                            iter_commit_numstats(repo, "master", since=since_date)
+                        )
                     except:
-                        commits = []
+                        commits = None
+
+                if commits is None:
+                    # If still no commits, get the commits in the period from
+                    # all local branches; git unions them and drops duplicates
+                    commits = _non_empty(
+                        iter_commit_numstats(repo, "--branches", since=since_date)
+                    )
 
-                if not commits:
-                    # If still no commits, get all commits from all branches
-                    commits = list(repo.iter_commits())
+                if commits is None:
+                    # Detached checkouts may have no local branches at all
+                    commits = iter_commit_numstats(repo, "HEAD", since=since_date)
 
             progress.update(task, description="Processing commits...")
 
-            # Initialize data structures
-            commit_information = []
-            contributors = defaultdict(
-                lambda: {
-                    "commits": 0,
-                    "lines_added": 0,
-                    "lines_deleted": 0,
-                    "files_changed": 0,
-                }
+            # set membership keeps the per-commit author check O(1)
+            contributor_set = (
+                frozenset(contributor_filter) if contributor_filter else None
             )
 
-            file_changes = defaultdict(int)
-            file_types = defaultdict(int)
-            commit_types = defaultdict(int)
-            day_activity = defaultdict(int)
-            total_lines_added = 0
-            total_lines_deleted = 0
-            total_files_changed = 0
+            # Initialize data structures. Per-commit values are kept in
+            # parallel lanes, and full records are only built for the commits
+            # that are returned
+            commit_hashes = []
+            commit_authors = []
+            commit_messages = []
+            commit_timestamps = array("q")
+            commit_added = array("q")
+            commit_deleted = array("q")
+            commit_files_changed = array("q")
+
+            file_changes = Counter()
+            file_types = Counter()
 
             for commit in commits:
                 # skip merge commits
-                if len(commit.parents) > 1:
+                if len(commit["parents"]) > 1:
                     continue
 
-                author_name = commit.author.name
-                author_email = commit.author.email
+                author_name = commit["author"]
 
                 # Filter by contributor if specified
-                if contributor_filter and author_name not in contributor_filter:
+                if contributor_set and author_name not in contributor_set:
                     continue
 
-                commit_date = datetime.fromtimestamp(commit.committed_date)
-                commit_message = commit.message.strip()
-                commit_diffs = get_commit_diffs_by_file(repo_path, commit.hexsha)
-
-                # Analyze diff for line counts
+                # Sum the numstat line counts
                 lines_added = 0
                 lines_deleted = 0
-                files_changed = len(commit_diffs)
+                numstat = commit["numstat"]
 
-                for file_path, diff_content in commit_diffs.items():
-                    file_added, file_deleted = analyze_diff_for_lines(diff_content)
+                for file_added, file_deleted in numstat.values():
                     lines_added += file_added
                     lines_deleted += file_deleted
 
-                    # Track file changes
-                    file_changes[file_path] += 1
-
-                    # Track file types
-                    file_ext = os.path.splitext(file_path)[1]
-                    if file_ext:
-                        file_types[file_ext] += 1
-
-                # Categorize commit
-                commit_type = analyze_commit_message(commit_message)
-                commit_types[commit_type] += 1
-
-                # Track day activity
-                day_key = commit_date.strftime("%A")
-                day_activity[day_key] += 1
-
-                # Update totals
-                total_lines_added += lines_added
-                total_lines_deleted += lines_deleted
-                total_files_changed += files_changed
-
-                # Update contributor stats
-                contributors[author_name]["commits"] += 1
-                contributors[author_name]["lines_added"] += lines_added
-                contributors[author_name]["lines_deleted"] += lines_deleted
-                contributors[author_name]["files_changed"] += files_changed
-
-                commit_information.append(
-                    {
-                        "hash": commit.hexsha,
-                        "author": author_name,
-                        "date": commit_date.strftime("%Y-%m-%d %H:%M:%S"),
-                        "message": commit_message,
-                        "diffs": commit_diffs,
-                        "lines_added": lines_added,
-                        "lines_deleted": lines_deleted,
-                        "files_changed": files_changed,
-                    }
-                )
+                # Track file changes and file types
+                file_changes.update(numstat.keys())
+                file_types.update(filter(None, map(file_extension, numstat)))
+
+                commit_hashes.append(commit["hash"])
+                commit_authors.append(author_name)
+                commit_messages.append(commit["message"].strip())
+                commit_timestamps.append(commit["committed_date"])
+                commit_added.append(lines_added)
+                commit_deleted.append(lines_deleted)
+                commit_files_changed.append(len(numstat))
+
+                if max_commits and len(commit_hashes) >= max_commits:
+                    break
+
+            # Update totals
+            total_lines_added = sum(commit_added)
+            total_lines_deleted = sum(commit_deleted)
+            total_files_changed = sum(commit_files_changed)
+
+            # Categorize commits and track day activity
+            commit_types = Counter(map(analyze_commit_message, commit_messages))
+            day_activity = Counter(
+                DAY_NAMES[time.localtime(timestamp).tm_wday]
+                for timestamp in commit_timestamps
+            )
+
+            # Update contributor stats
+            contributor_stats = {}
+            for author_name, lines_added, lines_deleted, files_changed in zip(
+                commit_authors, commit_added, commit_deleted, commit_files_changed
+            ):
+                stats = contributor_stats.get(author_name)
+                if stats is None:
+                    stats = contributor_stats[author_name] = ContribStats()
+                stats.commits += 1
+                stats.lines_added += lines_added
+                stats.lines_deleted += lines_deleted
+                stats.files_changed += files_changed
+
+            contributors = {
+                author_name: stats.as_dict()
+                for author_name, stats in contributor_stats.items()
+            }
+
+            record_count = len(commit_hashes)
+            if record_limit is not None:
+                record_count = min(record_count, record_limit)
+
+            commit_information = [
+                {
+                    "hash": commit_hashes[i],
+                    "author": commit_authors[i],
+                    "date": datetime.fromtimestamp(commit_timestamps[i]).strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    ),
+                    "message": commit_messages[i],
+                    "diffs": {},
+                    "lines_added": commit_added[i],
+                    "lines_deleted": commit_deleted[i],
+                    "files_changed": commit_files_changed[i],
+                }
+                for i in range(record_count)
+            ]
+
+            # Full diffs are only fetched for the most recent commits, the ones
+            # shown in reports; line counts come from numstat
+            diff_commits = commit_information[:diff_limit] if keep_diffs else []
+            if diff_commits:
+                progress.update(task, description="Fetching commit diffs...")
+                fetch_commit_diffs(repo_path, diff_commits)
 
         history = {
             "repo_name": (
                 str(repo.working_dir).split("/")[-1] if repo.working_dir else "Unknown"
             ),
-            "total_commits": len(commit_information),
+            "total_commits": len(commit_hashes),
             "commits": commit_information,
             "period": f"Last {days_back} days" if days_back > 0 else "All time",
             "contributor": (
@@ -269,7 +600,15 @@ def get_git_history(repo_path=".", days_back=30, contributor_filter=None, branch
             "filtered_by": (
                 contributor_filter if contributor_filter else "All contributors"
             ),
-            "contributors": dict(contributors),
+            "contributors": contributors,
+            "total_lines_added": total_lines_added,
+            "total_lines_deleted": total_lines_deleted,
+            "total_files_changed": total_files_changed,
+            # most frequent first
+            "commit_types": dict(commit_types.most_common()),
+            "day_activity": dict(day_activity.most_common()),
+            "file_changes": dict(file_changes.most_common()),
+            "file_types": dict(file_types.most_common()),
             "repository_structure": get_repository_structure(repo_path),
         }
 
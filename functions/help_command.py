@@ -1,40 +1,47 @@
-from rich.console import Console
+from functions.console import console
 
-def show_help():
-    """Display simple Rich-styled help information"""
-    
-    console = Console()
-    
+# The help screen, built once from adjacent literals that the compiler joins
+HELP_TEXT = (
     # Simple title
-    console.print("\n[bold blue]Reportr[/bold blue] - AI-powered repository analysis tool\n")
-    
-    # Commands
-    console.print("[bold]Available Commands:[/bold]")
-    console.print("  [green]progress-report[/green]    Generate a progress report")
-    console.print("  [green]generate-readme[/green]    Generate a README file")
-    console.print("  [green]summarize-details[/green]  Detailed directory analysis")
-    console.print("  [green]summarize-overview[/green] Repository overview")
-    console.print("  [green]llm-file-scan[/green]          AI-powered security scan of code files or folders")
-    console.print("  [green]security-scan-summary[/green]  Summarize security scan results by severity")
-    console.print("  [green]codeql-cwe-summary[/green]     Top CWEs, risk score, and executive summary from CodeQL results")
+    "\n[bold blue]Reportr[/bold blue] - AI-powered repository analysis tool\n\n"
 
+    # Commands
+    "[bold]Available Commands:[/bold]\n"
+    "  [green]progress-report[/green]    Generate a progress report\n"
+    "  [green]generate-readme[/green]    Generate a README file\n"
+    "  [green]summarize-details[/green]  Detailed directory analysis\n"
+    "  [green]summarize-overview[/green] Repository overview\n"
+    "  [green]llm-file-scan[/green]          AI-powered security scan of code files or folders\n"
+    "  [green]security-scan-summary[/green]  Summarize security scan results by severity\n"
+    "  [green]codeql-cwe-summary[/green]     Top CWEs, risk score, and executive summary from CodeQL results\n"
 
     # Examples
-    console.print("\n[bold]Examples:[/bold]")
-    console.print("  python reportr_client.py [sky_blue1]progress-report[/sky_blue1] --path [white]/path/to/repo[/white]")
-    console.print("  python reportr_client.py [sky_blue1]progress-report[/sky_blue1] --username [white]dev1[/white] --days [white]7[/white]")
-    console.print("  python reportr_client.py [sky_blue1]summarize-details[/sky_blue1] --path [white]/path/to/repo[/white]")
-    console.print("  python reportr_client.py [sky_blue1]llm-file-scan[/sky_blue1] --files [white]file1.py file2.py[/white]")
-    console.print("  python reportr_client.py [sky_blue1]llm-file-scan[/sky_blue1] --files [white]/path/to/dir[/white]")
-    console.print("  python reportr_client.py [sky_blue1]security-scan-summary[/sky_blue1] --input [white]scan_results.json[/white]")
-    console.print("  python reportr_client.py [sky_blue1]codeql-cwe-summary[/sky_blue1] --input [white]codeql_results.json[/white]")
+    "\n[bold]Examples:[/bold]\n"
+    "  python reportr.py [sky_blue1]progress-report[/sky_blue1] --path [white]/path/to/repo[/white]\n"
+    "  python reportr.py [sky_blue1]progress-report[/sky_blue1] --username [white]dev1[/white] --days [white]7[/white]\n"
+    "  python reportr.py [sky_blue1]summarize-details[/sky_blue1] --path [white]/path/to/repo[/white]\n"
+    "  python reportr.py [sky_blue1]llm-file-scan[/sky_blue1] --files [white]file1.py file2.py[/white]\n"
+    "  python reportr.py [sky_blue1]llm-file-scan[/sky_blue1] --files [white]/path/to/dir[/white]\n"
+    "  python reportr.py [sky_blue1]security-scan-summary[/sky_blue1] --input [white]scan_results.json[/white]\n"
+    "  python reportr.py [sky_blue1]codeql-cwe-summary[/sky_blue1] --input [white]codeql_results.json[/white]\n"
 
     # Options
-    console.print("\n[bold]Common Options:[/bold]")
-    console.print("  [plum2]--path[/plum2]      Path to repository or directory (default: current directory)")
-    console.print("  [plum2]--files[/plum2]     List of files or directories to scan (for llm-file-scan)")
-    console.print("  [plum2]--input[/plum2]     Input JSON file for scan summary commands")
+    "\n[bold]Common Options:[/bold]\n"
+    "  [plum2]--path[/plum2]      Path to repository or directory (default: current directory)\n"
+    "  [plum2]--files[/plum2]     List of files or directories to scan (for llm-file-scan)\n"
+    "  [plum2]--input[/plum2]     Input JSON file for scan summary commands\n"
 
-    console.print("  [plum2]--username[/plum2]  Filter by contributor username")
-    console.print("  [plum2]--days[/plum2]      Days to look back (default: [white]30[/white])")
-    console.print()
+    "  [plum2]--username[/plum2]  Filter by contributor username\n"
+    "  [plum2]--days[/plum2]      Days to look back (default: [white]30[/white])\n"
+    "  [plum2]--max-commits[/plum2]  Only analyze the N most recent commits (for progress-report)\n"
+    "  [plum2]--no-diffs[/plum2]  Leave commit diffs out of the AI prompt (for progress-report)\n"
+    "  [plum2]--no-cache[/plum2]  Regenerate instead of reusing cached results (for summarize-details, summarize-overview and generate-readme)\n"
+    "  [plum2]--batch[/plum2]     Send the AI requests as an Azure OpenAI batch job (for summarize-details, summarize-overview and progress-report)\n"
+    "  [plum2]--full-content[/plum2]  Send whole code files instead of their first lines (for summarize-overview)\n"
+    "  [plum2]--stream[/plum2]    Print the AI output as it is generated (for progress-report and summarize-overview)\n"
+    "  [plum2]--plain[/plum2]     Print results as plain text instead of Rich panels (for the summarize and scan commands)\n"
+)
+
+def show_help():
+    """Display simple Rich-styled help information"""
+    console.print(HELP_TEXT)
@@ -0,0 +1,77 @@
+import json
+
+# Characters read from the file at a time while decoding
+READ_CHUNK_CHARS = 64 * 1024
+# Characters that can continue a number, so one cut off by the end of a chunk
+# is not taken for a complete value
+NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(file, chunk_size=READ_CHUNK_CHARS):
+    """
+    Yields the items of a top-level JSON array one at a time.
+
+    Only the item being decoded is held in memory along with the unread part
+    of the current chunk, instead of the whole parsed array.
+
+    Args:
+        file: Text file object positioned at the start of the array
+        chunk_size: Characters read from the file at a time
+
+    Yields:
+        Each decoded item of the array, in order
+
+    Raises:
+        ValueError: If the file does not hold a well-formed JSON array
+    """
+    buffer = ""
+    position = 0
+    at_eof = False
+
+    def _next_char():
+        # skip whitespace, reading more of the file as needed, and return the
+        # next significant character or "" at the end of the file
+        nonlocal buffer, position, at_eof
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or at_eof:
+                return buffer[position : position + 1]
+            chunk = file.read(chunk_size)
+            buffer, position = chunk, 0
+            at_eof = not chunk
+
+    if _next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    position += 1
+
+    if _next_char() == "]":
+        return
+
+    while True:
+        if not _next_char():
+            raise ValueError("Unexpected end of JSON array")
+        # decode the next item, reading more until it is complete
+        while True:
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+                if at_eof or (end < len(buffer) and buffer[end] not in NUMBER_CHARS):
+                    break
+            except json.JSONDecodeError:
+                if at_eof:
+                    raise
+            chunk = file.read(chunk_size)
+            buffer = buffer[position:] + chunk
+            position = 0
+            at_eof = not chunk
+        position = end
+        yield item
+
+        separator = _next_char()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError("Expected ',' or ']' between JSON array items")
+        position += 1
@@ -0,0 +1,316 @@
+import asyncio
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+# Model requests in flight at once by default; enough to overlap the network
+# round trips while staying well inside the deployment's rate limits
+MAX_CONCURRENT_REQUESTS = 10
+
+# Attempts per chat completion before a transient error is given up on
+MAX_REQUEST_ATTEMPTS = 3
+# Errors worth retrying: rate limits, timeouts, dropped connections and 5xx
+TRANSIENT_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+# Seconds between status checks of a submitted batch job
+BATCH_POLL_SECONDS = 15
+# Deployment that Batch API jobs run on. Azure serves batch jobs from a
+# deployment of its own, which can't share the "reportr" name of the standard
+# one. Overridden by AZURE_OPENAI_BATCH_DEPLOYMENT
+BATCH_DEPLOYMENT = "reportr-batch"
+# Seconds to wait for a batch job before cancelling it; jobs may otherwise run
+# for the whole 24h completion window. Overridden by REPORTR_BATCH_TIMEOUT
+BATCH_TIMEOUT_SECONDS = 4 * 60 * 60
+# Batch job states after which the job makes no more progress
+BATCH_FINAL_STATES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+def run_parallel(func, items, max_concurrency=MAX_CONCURRENT_REQUESTS, on_done=None):
+    """
+    Calls func on every item concurrently and returns the results in item order.
+
+    Meant for blocking model requests: each call runs in a worker thread so the
+    round trips overlap instead of waiting on one another. The first exception
+    raised by func propagates to the caller.
+
+    Args:
+        func: Function taking one item; it must be safe to call from threads
+        items: Items to process
+        max_concurrency: Maximum number of calls running at once
+        on_done: Optional callback without arguments, called after each item
+
+    Returns:
+        list: func's result for each item, in the order of items
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    workers = min(max_concurrency, len(items))
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_run_async(func, items, workers, on_done))
+
+    # asyncio.run cannot start inside a running event loop (e.g. when called
+    # from a notebook or async code), so use plain threads there
+    return _run_threaded(func, items, workers, on_done)
+
+
+async def _run_async(func, items, workers, on_done):
+    """Gather every call on an event loop, at most workers at once."""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+
+        async def _bounded(item):
+            async with semaphore:
+                # the calls are blocking, so they run off the event loop
+                result = await loop.run_in_executor(executor, func, item)
+            if on_done:
+                on_done()
+            return result
+
+        return await asyncio.gather(*(_bounded(item) for item in items))
+
+
+def _run_threaded(func, items, workers, on_done):
+    """Run every call on a thread pool of the given size."""
+
+    def _run(item):
+        result = func(item)
+        if on_done:
+            on_done()
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map keeps the results in item order
+        return list(executor.map(_run, items))
+
+
+def submit_batch(
+    client,
+    requests,
+    poll_interval=BATCH_POLL_SECONDS,
+    on_poll=None,
+    deployment=None,
+    timeout=None,
+):
+    """
+    Runs chat completion requests as one Batch API job and waits for it.
+
+    Batch jobs are billed at a discount and use their own rate limits, which
+    suits bulk work where no single answer is needed right away. Every request
+    is sent to the batch deployment in place of its own model.
+
+    Args:
+        client: OpenAI or Azure OpenAI client instance, on an API version
+            that supports batch jobs
+        requests: List of keyword-argument dicts for chat.completions.create
+        poll_interval: Seconds between status checks
+        on_poll: Optional callback receiving the batch object after each check
+        deployment: Batch deployment name (default: the
+            AZURE_OPENAI_BATCH_DEPLOYMENT environment variable, or
+            BATCH_DEPLOYMENT)
+        timeout: Seconds to wait before the job is cancelled (default: the
+            REPORTR_BATCH_TIMEOUT environment variable, or
+            BATCH_TIMEOUT_SECONDS). The answers that finished by then are
+            still returned once the cancellation completes.
+
+    Returns:
+        list: The reply text for each request, in order, or None for requests
+        that failed or did not finish before the job ended or was cancelled
+    """
+    if not requests:
+        return []
+
+    if deployment is None:
+        deployment = os.getenv("AZURE_OPENAI_BATCH_DEPLOYMENT", BATCH_DEPLOYMENT)
+    if timeout is None:
+        timeout = float(os.getenv("REPORTR_BATCH_TIMEOUT", BATCH_TIMEOUT_SECONDS))
+
+    lines = [
+        json.dumps(
+            {
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/chat/completions",
+                "body": {**request, "model": deployment},
+            },
+            ensure_ascii=False,
+        )
+        for index, request in enumerate(requests)
+    ]
+    input_file = client.files.create(
+        file=("reportr-batch.jsonl", "\n".join(lines).encode("utf-8")),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/chat/completions",
+        completion_window="24h",
+    )
+
+    deadline = time.monotonic() + timeout
+    cancelled = False
+    while True:
+        batch = client.batches.retrieve(batch.id)
+        if on_poll:
+            on_poll(batch)
+        if batch.status in BATCH_FINAL_STATES:
+            break
+        if not cancelled and time.monotonic() >= deadline:
+            # a cancelled job still returns the answers that did finish, so
+            # keep polling until the cancellation has gone through
+            client.batches.cancel(batch.id)
+            cancelled = True
+        time.sleep(poll_interval)
+
+    replies = [None] * len(requests)
+    # expired and cancelled jobs still return the answers that did finish
+    if not batch.output_file_id:
+        return replies
+
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        response = result.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        try:
+            message = response["body"]["choices"][0]["message"]
+            replies[int(result["custom_id"])] = message["content"]
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue
+    return replies
+
+
+def complete_in_batch(
+    client,
+    request,
+    poll_interval=BATCH_POLL_SECONDS,
+    on_poll=None,
+    deployment=None,
+    timeout=None,
+):
+    """
+    Runs one chat completion request as a Batch API job and waits for it.
+
+    Args:
+        client: OpenAI or Azure OpenAI client instance
+        request: Keyword-argument dict for chat.completions.create
+        poll_interval: Seconds between status checks
+        on_poll: Optional callback receiving the batch object after each check
+        deployment: Batch deployment name, as for submit_batch
+        timeout: Seconds to wait before the job is cancelled, as for
+            submit_batch
+
+    Returns:
+        str: The reply text
+
+    Raises:
+        RuntimeError: If the job ended without an answer to the request
+    """
+    final_status = None
+
+    def _on_poll(batch):
+        nonlocal final_status
+        final_status = batch.status
+        if on_poll:
+            on_poll(batch)
+
+    reply = submit_batch(
+        client, [request], poll_interval, _on_poll, deployment, timeout
+    )[0]
+    if reply is None:
+        raise RuntimeError(f"Batch job ended ({final_status}) without an answer")
+    return reply
+
+
+def stream_completion(client, on_text=None, **kwargs):
+    """
+    Requests a chat completion as a stream and returns the whole reply.
+
+    Tokens reach on_text as soon as the model produces them, so an interactive
+    command can show the answer being written instead of a spinner.
+
+    Args:
+        client: OpenAI or Azure OpenAI client instance
+        on_text: Optional callback receiving each piece of text as it arrives
+        **kwargs: Arguments for chat.completions.create, without stream
+
+    Returns:
+        str: The full reply text
+    """
+    parts = []
+    for chunk in client.chat.completions.create(stream=True, **kwargs):
+        # Azure sends content filter results as chunks without choices
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if text:
+            parts.append(text)
+            if on_text:
+                on_text(text)
+    return "".join(parts)
+
+
+class RetryingClient:
+    """
+    Wraps an OpenAI client so chat completions are retried on transient errors.
+
+    A rate limit or server error then costs one delayed request instead of a
+    rerun of the whole command and every request that already succeeded. The
+    client's own short retries still happen first; these back off for longer.
+    Every other attribute is passed through to the wrapped client.
+    """
+
+    def __init__(self, client, max_attempts=MAX_REQUEST_ATTEMPTS):
+        self._client = client
+        self.max_attempts = max_attempts
+        self.chat = _RetryingChat(self)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _RetryingChat:
+    """The client's chat namespace with retrying completions."""
+
+    def __init__(self, owner):
+        self._owner = owner
+        self.completions = _RetryingCompletions(owner)
+
+    def __getattr__(self, name):
+        return getattr(self._owner._client.chat, name)
+
+
+class _RetryingCompletions:
+    """The client's chat.completions with a retrying create()."""
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        completions = self._owner._client.chat.completions
+        for attempt in range(1, self._owner.max_attempts + 1):
+            try:
+                return completions.create(**kwargs)
+            except TRANSIENT_ERRORS:
+                if attempt == self._owner.max_attempts:
+                    raise
+                # exponential backoff with jitter so parallel requests spread out
+                time.sleep(2**attempt + random.random())
+
+    def __getattr__(self, name):
+        return getattr(self._owner._client.chat.completions, name)
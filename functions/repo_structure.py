@@ -0,0 +1,246 @@
+import os
+import codecs
+import functools
+import itertools
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+
+# Directories that are never walked, along with any hidden directory
+SKIP_DIRS = frozenset({"venv", ".git", "__pycache__", "node_modules", "dist", "build"})
+# File types included in the repository structure
+INCLUDED_EXTENSIONS = frozenset(
+    {
+        ".py",
+        ".md",
+        ".txt",
+        ".json",
+        ".js",
+        ".jsx",
+        ".ts",
+        ".tsx",
+        ".cs",
+        ".rs",
+        ".go",
+        ".java",
+        ".php",
+        ".rb",
+        ".swift",
+        ".kt",
+        ".cpp",
+        ".c",
+        ".h",
+        ".hpp",
+        ".sh",
+        ".bat",
+        ".yml",
+        ".yaml",
+        ".xml",
+        ".html",
+        ".css",
+        ".scss",
+        ".less",
+        ".sass",
+        ".sql",
+        ".csv",
+        ".tsv",
+        ".jsonl",
+    }
+)
+# str.endswith(tuple) checks every suffix in C without building a splitext tuple
+INCLUDED_SUFFIXES = tuple(INCLUDED_EXTENSIONS)
+# Bulk data rarely says anything about the code and costs the most tokens
+DATA_SUFFIXES = (".csv", ".tsv", ".jsonl")
+
+# Worker threads used to read file contents in parallel
+READ_WORKERS = max(4, min(32, (os.cpu_count() or 1) * 4))
+# Files larger than this are memory-mapped instead of read through a buffer
+MMAP_THRESHOLD_BYTES = 64 * 1024
+# Only this much of each file is sent to the model, the rest is cut off
+MAX_CONTENT_BYTES = 64 * 1024
+
+
+def read_text(path):
+    """
+    Returns up to MAX_CONTENT_BYTES of a text file.
+    Args:
+        path: Path of the file to read
+    Returns:
+        The file's text with a truncation marker if it was cut off, or an
+        error marker instead of raising
+    """
+    try:
+        file_size = os.path.getsize(path)
+        if file_size > MMAP_THRESHOLD_BYTES:
+            # let the kernel page the file in on demand instead of copying it
+            # through Python's read buffer first - only the kept prefix is touched
+            with open(path, "rb") as file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mapped:
+                data = mapped[:MAX_CONTENT_BYTES]
+            # a non-final incremental decode drops a multi-byte character cut
+            # in half at the end instead of failing on it
+            content = codecs.getincrementaldecoder("utf-8")().decode(data)
+            # match the newline translation of text-mode reads
+            if "\r" in content:
+                content = content.replace("\r\n", "\n").replace("\r", "\n")
+            if file_size > MAX_CONTENT_BYTES:
+                content += f"\n... [truncated {file_size - MAX_CONTENT_BYTES} bytes]"
+            return content
+
+        with open(path, "r", encoding="utf-8") as file:
+            return file.read()
+    except Exception as e:
+        return f"# Error reading file: {e}"
+
+
+def read_head(path, max_lines):
+    """
+    Returns the first lines of a text file without reading the rest of it.
+    Args:
+        path: Path of the file to read
+        max_lines: Number of lines to keep
+    Returns:
+        The file's first max_lines lines with a truncation marker if there
+        were more, or an error marker instead of raising
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            # one extra line tells whether anything was cut off
+            lines = list(itertools.islice(file, max_lines + 1))
+    except Exception as e:
+        return f"# Error reading file: {e}"
+
+    truncated = len(lines) > max_lines
+    content = "".join(lines[:max_lines])
+    # a handful of minified lines can still be huge
+    if len(content) > MAX_CONTENT_BYTES:
+        content = content[:MAX_CONTENT_BYTES]
+        truncated = True
+    if truncated:
+        content += f"\n... [truncated after {max_lines} lines]"
+    return content
+
+
+def build_repo_structure(
+    repo_path,
+    include_content=True,
+    include_data=True,
+    max_file_size=None,
+    head_lines=None,
+    full_content_suffixes=(),
+):
+    """
+    Build a nested dictionary structure representing the repository.
+
+    Results are memoised per resolved path and options. A cached structure is
+    reused until the repository root's mtime changes, so callers must not
+    modify the result.
+
+    Args:
+        repo_path: Path to the repository
+        include_content: Whether to read each file's text into its "content"
+            key (default: True). Tree-only callers pass False to skip all reads.
+        include_data: Whether to read data files such as .csv, .tsv and .jsonl
+            (default: True). When False they are listed without contents.
+        max_file_size: Files larger than this many bytes are listed with a
+            "too large" note instead of their contents (default: no limit)
+        head_lines: Only read this many lines from the start of each file
+            (default: None, read whole files up to MAX_CONTENT_BYTES)
+        full_content_suffixes: Extensions that are always read whole, even
+            when head_lines is set (default: none)
+
+    Returns:
+        dict: Nested dictionary with folder names as keys and lists of file dictionaries as values
+    """
+    real_path = os.path.realpath(repo_path)
+    root_mtime = os.stat(real_path).st_mtime_ns
+    return _build_repo_structure(
+        real_path,
+        root_mtime,
+        include_content,
+        include_data,
+        max_file_size,
+        head_lines,
+        tuple(full_content_suffixes),
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _build_repo_structure(
+    repo_path,
+    root_mtime,
+    include_content,
+    include_data,
+    max_file_size,
+    head_lines,
+    full_content_suffixes,
+):
+    """Walk and read the repository; root_mtime only takes part in the cache key."""
+
+    # file nodes whose content still has to be read, filled in after the walk
+    pending_reads = []
+
+    structure = {}
+    # contents dict of every folder reached so far, so os.walk can fill each
+    # folder in when it gets there without searching down from the root
+    folder_contents = {repo_path: structure}
+
+    # topdown walk, pruning dirs[:] in place so skipped directories are never entered
+    for root, dirs, files in os.walk(repo_path):
+        # skipped, hidden and symlinked directories are left out of the tree;
+        # os.walk lists directory symlinks but doesn't descend into them
+        dirs[:] = [
+            d
+            for d in dirs
+            if not (
+                d in SKIP_DIRS or d[0] == "." or os.path.islink(os.path.join(root, d))
+            )
+        ]
+        dir_names = set(dirs)
+
+        repo_content = folder_contents[root]
+        # files and folders are added in one sorted pass, the same order the
+        # tree and the prompt have always used
+        for item in sorted(dirs + [f for f in files if f.endswith(INCLUDED_SUFFIXES)]):
+            full_path = os.path.join(root, item)
+
+            if item in dir_names:
+                subfolder_content = folder_contents[full_path] = {}
+                repo_content[item] = {"type": "folder", "contents": subfolder_content}
+                continue
+
+            repo_content[item] = node = {"type": "file"}
+            if not include_content:
+                continue
+
+            if max_file_size is not None:
+                try:
+                    file_size = os.path.getsize(full_path)
+                except OSError as e:
+                    node["content"] = f"# Error reading file: {e}"
+                    continue
+                # Skip files that are too large to prevent memory issues and excessive API costs
+                if file_size > max_file_size:
+                    node["content"] = (
+                        f"# File too large ({file_size / 1024:.1f}KB) - skipped for analysis"
+                    )
+                    continue
+
+            if not include_data and item.endswith(DATA_SUFFIXES):
+                node["content"] = "# Data file - contents omitted from analysis"
+                continue
+
+            pending_reads.append((full_path, node))
+
+    def _read(full_path):
+        if head_lines is None or full_path.endswith(full_content_suffixes):
+            return read_text(full_path)
+        return read_head(full_path, head_lines)
+
+    # file reads are dominated by syscall latency, so overlap them in a thread pool
+    paths = [full_path for full_path, _ in pending_reads]
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        for (_, node), content in zip(pending_reads, executor.map(_read, paths)):
+            node["content"] = content
+
+    return structure
@@ -0,0 +1,55 @@
+import re
+import shutil
+import sys
+
+# Rich markup tags: a bracketed name starting with a letter, #, / or @,
+# optionally escaped with a backslash (same rule Rich itself uses)
+MARKUP_TAG_PATTERN = re.compile(r"(\\*)\[([a-z#/@][^[]*?)]")
+# Rule drawn above and below each panel
+RULE = "─"
+# Panels are never wider than this, like the Rich panels
+MAX_PANEL_WIDTH = 120
+
+
+def strip_markup(text):
+    """
+    Remove Rich markup tags from text, keeping escaped brackets as literal text.
+
+    Args:
+        text: Text that may contain Rich markup such as [bold]...[/bold]
+
+    Returns:
+        str: The text without markup
+    """
+
+    def _replace(match):
+        backslashes, tag = match.groups()
+        # pairs of backslashes stand for one literal backslash each, and an
+        # odd one out escapes the bracket
+        pairs, escaped = divmod(len(backslashes), 2)
+        return "\\" * pairs + (f"[{tag}]" if escaped else "")
+
+    return MARKUP_TAG_PATTERN.sub(_replace, text)
+
+
+def print_panel(title, content, width=None, file=None):
+    """
+    Print content between two rules, the first carrying the title.
+
+    A plain-text stand-in for a Rich Panel that needs no Rich import or layout
+    pass and copies cleanly from terminals and logs.
+
+    Args:
+        title: Panel title
+        content: Panel body; Rich markup in it is removed
+        width: Width of the rules (default: terminal width, at most 120)
+        file: Stream to write to (default: sys.stdout)
+    """
+    file = file or sys.stdout
+    if width is None:
+        width = min(MAX_PANEL_WIDTH, shutil.get_terminal_size().columns - 4)
+
+    heading = f"{RULE * 2} {title} "
+    file.write(heading + RULE * max(0, width - len(heading)) + "\n")
+    file.write(strip_markup(content).rstrip("\n") + "\n")
+    file.write(RULE * width + "\n\n")
@@ -0,0 +1,109 @@
+import re
+
+# Markdown patterns used by format_markdown_text, compiled once
+BOLD_PATTERN = re.compile(r"\*\*(.*?)\*\*")
+# Only properly closed backticks count as code
+CODE_PATTERN = re.compile(r"`([^`\n]+)`")
+
+# Line prefixes that start a numbered list item in a summary
+NUMBERED_PREFIXES = ("1. ", "2. ", "3. ", "4. ", "5. ", "6. ", "7. ", "8. ", "9. ")
+
+# Rich markup for each kind of summary line
+SECTION_HEADER_TEMPLATE = "\n[bold green]{}[/bold green]"
+NUMBERED_ITEM_TEMPLATE = "    [{0}]{1}[/{0}][white]{2}[/white]"
+BULLET_TEMPLATE = "    • [white]{}[/white]"
+SUB_BULLET_TEMPLATE = "        ◦ [white]{}[/white]"
+CONTINUATION_TEMPLATE = "        [white]{}[/white]"
+TEXT_TEMPLATE = "[white]{}[/white]"
+
+
+def format_markdown_text(text):
+    """
+    Format markdown-style text with Rich markup for **bold** and `code` elements.
+
+    Args:
+        text: Text that may contain **bold** or `code` markdown
+
+    Returns:
+        str: Text with Rich markup applied
+    """
+    # Skip the regex passes entirely for the common plain-text line
+    if "*" not in text and "`" not in text:
+        return text
+
+    # Replace **bold text** with Rich bold markup in bright white
+    text = BOLD_PATTERN.sub(r"[bold bright_white]\1[/bold bright_white]", text)
+
+    # Replace `code text` with Rich markup, but only if properly closed
+    # This prevents issues with unclosed backticks causing everything to be treated as code
+    text = CODE_PATTERN.sub(r"[cornsilk1]\1[/cornsilk1]", text)
+
+    return text
+
+
+def format_summary_lines(summary, number_style):
+    """
+    Convert a markdown summary from the model into Rich-formatted lines.
+
+    Args:
+        summary: Markdown text returned by the model
+        number_style: Rich style for the numbers of numbered list items
+
+    Returns:
+        list: Formatted lines, in order
+    """
+    lines = []
+    in_numbered_list = False
+
+    for original_line in summary.split("\n"):
+        line = original_line.strip()
+
+        if not line:
+            lines.append("")
+            in_numbered_list = False
+            continue
+
+        # Check for markdown headers (## Section Name) - these are our main section headers
+        if line.startswith("## "):
+            header_text = format_markdown_text(line[3:].strip())
+            lines.append(SECTION_HEADER_TEMPLATE.format(header_text))
+            in_numbered_list = False
+        # Handle numbered lists (lines starting with numbers)
+        elif line.startswith(NUMBERED_PREFIXES):
+            space_index = line.find(" ")
+            number_part = line[: space_index + 1]
+            text_content = format_markdown_text(line[space_index + 1 :].strip())
+            lines.append(
+                NUMBERED_ITEM_TEMPLATE.format(number_style, number_part, text_content)
+            )
+            in_numbered_list = True
+        # Color code bullet points (lines starting with -)
+        elif line.startswith("- "):
+            text_content = format_markdown_text(line[2:].strip())
+            if in_numbered_list:
+                # This is a sub-bullet under a numbered item
+                lines.append(SUB_BULLET_TEMPLATE.format(text_content))
+            else:
+                # This is a top-level bullet
+                lines.append(BULLET_TEMPLATE.format(text_content))
+        # Check if this line looks like it should be indented under a numbered item
+        elif in_numbered_list and (
+            original_line.startswith(("  ", "\t")) or line.startswith("◦")
+        ):
+            formatted_line = format_markdown_text(line)
+            if line.startswith("◦"):
+                # Already has bullet point
+                lines.append(CONTINUATION_TEMPLATE.format(formatted_line))
+            else:
+                lines.append(SUB_BULLET_TEMPLATE.format(formatted_line))
+        # Regular text - keep as is but format markdown
+        else:
+            formatted_line = format_markdown_text(line)
+            # Make sure all regular text is properly colored (not greyed out)
+            if formatted_line and not formatted_line.startswith("["):
+                lines.append(TEXT_TEMPLATE.format(formatted_line))
+            else:
+                lines.append(formatted_line)
+            in_numbered_list = False
+
+    return lines
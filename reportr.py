@@ -1,281 +1,519 @@
 import os
+import sys
 import json
 import argparse
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-from rich.console import Console
-from rich.panel import Panel
-from features.progress_report.progress_report import create_progress_report
-from features.generate_readme.generate_readme import (
-    generate_readme,
-    write_to_readme_file,
-)
-from features.summarize_details.summarize_details import (
-    summarize_details,
-)
-from features.summarize_overview.summarize_overview import (
-    summarize_overview,
-)
-from functions.help_command import show_help
+import functools
+import collections
 
-from features.code_quality.llm_file_scan import create_llm_file_scan
-from features.code_quality.security_scan_summary import (
-    generate_security_scan_summary as summary_text,
-)
-from features.code_quality.codeql_cwe_insights import (
-    generate_security_scan_summary as summary_json,
-)
+# feature modules, the openai SDK and rich are imported where they are used,
+# so each command only loads what it needs
+
+# Azure OpenAI resource and API version every request is sent to
+AZURE_OPENAI_ENDPOINT = "https://natalie-design-agent-resource.cognitiveservices.azure.com/"
+AZURE_OPENAI_API_VERSION = "2024-02-15-preview"
+# API version for --batch; batch files and the /batches endpoint need a newer
+# one than chat completions. Overridden by AZURE_OPENAI_BATCH_API_VERSION
+AZURE_OPENAI_BATCH_API_VERSION = "2024-10-21"
+
+# whether _ensure_env has already loaded the .env file in this process
+_ENV_LOADED = False
+
+
+# load environment variables from .env file when they are needed
+def _ensure_env(*names):
+    """Load the .env file once, unless the environment already has all of names"""
+    global _ENV_LOADED
+    if _ENV_LOADED:
+        return
 
-from features.code_quality.codeql_cwe_insights import generate_codeql_cwe_insights
+    # e.g. CI or a shell that exports the key has nothing to read from .env
+    if all(os.environ.get(name) for name in names):
+        return
+    _ENV_LOADED = True
 
-# load environment variables from .env file
-from dotenv import load_dotenv
+    from dotenv import load_dotenv
 
-load_dotenv()
+    load_dotenv()
 
 
 # create the azure openai client
+# one shared client per process keeps its connection pool, so later requests
+# reuse open connections instead of paying for a new TLS handshake
+@functools.lru_cache(maxsize=1)
 def create_client():
     """Create and return an Azure OpenAI client"""
-
-    return AzureOpenAI(
-        api_key=os.getenv("AZURE_OPENAI_KEY"),
-        api_version="2024-02-15-preview",
-        azure_endpoint="https://natalie-design-agent-resource.cognitiveservices.azure.com/",
+    from openai import AzureOpenAI
+    from functions.llm import RetryingClient
+
+    _ensure_env("AZURE_OPENAI_KEY")
+
+    # retry transient errors per request instead of failing the whole command
+    return RetryingClient(
+        AzureOpenAI(
+            # read once per process, since the client is memoized
+            api_key=os.getenv("AZURE_OPENAI_KEY"),
+            api_version=AZURE_OPENAI_API_VERSION,
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+        )
     )
 
 
-# parse the arguments from the command line
-def parse_arguments():
-    """Parse and return command line arguments"""
+# create the azure openai client used for --batch
+@functools.lru_cache(maxsize=1)
+def create_batch_client():
+    """Create and return an Azure OpenAI client for Batch API jobs"""
+    from openai import AzureOpenAI
 
-    # create the parser
-    parser = argparse.ArgumentParser(
-        description="Reportr - AI-powered repository analysis and documentation tool",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        add_help=False,  # Disable default help to use our Rich styled help
-        epilog="""
-            Examples:
-            python reportr.py generate-readme
-            python reportr.py generate-readme --path /path/to/repo
-            python reportr.py summarize-details --path /path/to/repo
-            python reportr.py summarize-overviews --path /path/to/repo
-            python reportr.py progress-report --username "msft-alias"
-            python reportr.py progress-report --path /path/to/repo --days 60
-            python reportr.py progress-report --branch "develop"
-            python reportr.py progress-report --path /path/to/repo --branch "feature/new-feature" --username "dev1" --username "dev2"
-        """,
+    # the batch settings may come from .env even when the key is exported
+    _ensure_env(
+        "AZURE_OPENAI_KEY",
+        "AZURE_OPENAI_BATCH_DEPLOYMENT",
+        "AZURE_OPENAI_BATCH_API_VERSION",
+        "REPORTR_BATCH_TIMEOUT",
     )
 
-    # Add help argument manually
-    parser.add_argument(
-        "-h", "--help", action="store_true", help="Show this help message and exit"
+    # the jobs go to the batch deployment set in functions.llm, not "reportr"
+    return AzureOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_KEY"),
+        api_version=os.getenv(
+            "AZURE_OPENAI_BATCH_API_VERSION", AZURE_OPENAI_BATCH_API_VERSION
+        ),
+        azure_endpoint=AZURE_OPENAI_ENDPOINT,
     )
 
-    # create subparsers for different commands
-    subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
-    # progress-report subcommand
-    progress_parser = subparsers.add_parser(
-        "progress-report", help="Generate a progress report for the current repository"
-    )
-    progress_parser.add_argument(
+# style of the result panel titles
+PANEL_TITLE_STYLE = "bold sky_blue1"
+
+# top-level arguments that only ask for the help screen
+HELP_FLAGS = frozenset({"-h", "--help"})
+
+
+def add_progress_report_arguments(parser):
+    """Add the progress-report options to its subparser"""
+    parser.add_argument(
         "--path",
         type=str,
         default=".",
         help="Path to the local repository or directory to analyze (default: current directory)",
     )
-    progress_parser.add_argument(
+    parser.add_argument(
         "--username",
         action="append",
         help="Filter by specific contributor username(s). Can be used multiple times.",
     )
-    progress_parser.add_argument(
+    parser.add_argument(
         "--days",
         type=int,
         default=30,
         help="Number of days to look back (default: 30, use 0 for all time)",
     )
-    progress_parser.add_argument(
+    parser.add_argument(
         "--branch",
         type=str,
         help="Specify which branch to analyze (default: tries main, then master, then all branches)",
     )
-
-    # generate-readme subcommand
-    readme_parser = subparsers.add_parser(
-        "generate-readme", help="Generate a README file for the current repository"
+    parser.add_argument(
+        "--max-commits",
+        type=int,
+        help="Only analyze the N most recent commits (default: no limit)",
+    )
+    parser.add_argument(
+        "--no-diffs",
+        action="store_true",
+        help="Leave commit diffs out of the AI prompt for a faster, smaller report",
     )
-    readme_parser.add_argument(
+    # streaming needs an immediate answer, which a batch job doesn't give
+    output_mode = parser.add_mutually_exclusive_group()
+    output_mode.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the AI report as it is generated instead of waiting for all of it",
+    )
+    output_mode.add_argument(
+        "--batch",
+        action="store_true",
+        help="Send the AI request as an Azure OpenAI batch job (cheaper, but can take a while)",
+    )
+
+
+def add_generate_readme_arguments(parser):
+    """Add the generate-readme options to its subparser"""
+    parser.add_argument(
         "--path",
         type=str,
         default=".",
         help="Path to the local repository or directory to generate README for (default: current directory)",
     )
-
-    # summarize-details subcommand
-    summarize_folder_parser = subparsers.add_parser(
-        "summarize-details", help="Summarize a sub-directory with a focus on details"
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Generate a new README even if one was cached for this commit",
     )
-    summarize_folder_parser.add_argument(
+
+
+def add_summarize_details_arguments(parser):
+    """Add the summarize-details options to its subparser"""
+    parser.add_argument(
         "--path",
         type=str,
         default=".",
         help="Path to the local repository or directory to summarize (default: current directory)",
     )
-
-    # summarize-overview subcommand
-    summarize_entire_parser = subparsers.add_parser(
-        "summarize-overview", help="Summarize the repository overview and structure"
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached directory summaries and re-analyze every directory",
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Send the directory summaries as one Azure OpenAI batch job (cheaper, but can take a while)",
+    )
+
 
-    summarize_entire_parser.add_argument(
+def add_summarize_overview_arguments(parser):
+    """Add the summarize-overview options to its subparser"""
+    parser.add_argument(
         "--path",
         type=str,
         default=".",
         help="Path to the local repository or directory to summarize (default: current directory)",
     )
-
-    # llm-file-scan subcommand
-    llm_scan_parser = subparsers.add_parser(
-        "llm-file-scan", help="Analyze code files for security issues using LLM"
+    parser.add_argument(
+        "--full-content",
+        action="store_true",
+        help="Send whole code files instead of only their first lines",
     )
-    llm_scan_parser.add_argument(
-        "--files", nargs="+", required=True, help="List of code files to analyze"
+    output_mode = parser.add_mutually_exclusive_group()
+    output_mode.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the summary as it is generated instead of waiting for all of it",
+    )
+    output_mode.add_argument(
+        "--batch",
+        action="store_true",
+        help="Send the AI request as an Azure OpenAI batch job (cheaper, but can take a while)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Generate a new summary even if one was cached for this commit",
     )
 
-    # security-scan-summary subcommand
-    # This command is for summarizing security scan results in text format
-    sec_scan_parser = subparsers.add_parser(
-        "security-scan-summary", help="Summarize security scan results (text output)"
+
+def add_llm_file_scan_arguments(parser):
+    """Add the llm-file-scan options to its subparser"""
+    parser.add_argument(
+        "--files", nargs="+", required=True, help="List of code files to analyze"
     )
-    sec_scan_parser.add_argument(
+
+
+def add_scan_input_arguments(parser):
+    """Add the --input option shared by the scan summary commands"""
+    parser.add_argument(
         "--input", required=True, help="Path to a JSON file with scan results"
     )
 
-    # codeql-cwe-summary subcommand
-    # This command is for summarizing security scan results in JSON format
-    codeql_parser = subparsers.add_parser(
-        "codeql-cwe-summary", help="Summarize CodeQL scan results (JSON output)"
+
+# every command with its help line and the function adding its options,
+# in the order they are listed by --help
+COMMANDS = {
+    "progress-report": (
+        "Generate a progress report for the current repository",
+        add_progress_report_arguments,
+    ),
+    "generate-readme": (
+        "Generate a README file for the current repository",
+        add_generate_readme_arguments,
+    ),
+    "summarize-details": (
+        "Summarize a sub-directory with a focus on details",
+        add_summarize_details_arguments,
+    ),
+    "summarize-overview": (
+        "Summarize the repository overview and structure",
+        add_summarize_overview_arguments,
+    ),
+    "llm-file-scan": (
+        "Analyze code files for security issues using LLM",
+        add_llm_file_scan_arguments,
+    ),
+    # summarizes security scan results in text format
+    "security-scan-summary": (
+        "Summarize security scan results (text output)",
+        add_scan_input_arguments,
+    ),
+    # summarizes CodeQL scan results in JSON format
+    "codeql-cwe-summary": (
+        "Summarize CodeQL scan results (JSON output)",
+        add_scan_input_arguments,
+    ),
+}
+
+# commands whose handlers yield results for main() to print; the others print
+# their own output with Rich
+RESULT_COMMANDS = frozenset(
+    {
+        "summarize-details",
+        "summarize-overview",
+        "llm-file-scan",
+        "security-scan-summary",
+        "codeql-cwe-summary",
+    }
+)
+
+# former command names, still accepted for existing scripts
+COMMAND_ALIASES = {
+    "summarize-by-folder": "summarize-details",
+    "summarize-entire-directory": "summarize-overview",
+}
+
+
+# build the argument parser on first use and reuse it afterwards
+@functools.lru_cache(maxsize=None)
+def build_parser(command=None):
+    """
+    Build and return the command line argument parser.
+    For a known command only its own subparser is added; any other value
+    builds all of them, so errors and help still list every command.
+    """
+
+    # create the parser
+    parser = argparse.ArgumentParser(
+        description="Reportr - AI-powered repository analysis and documentation tool",
+        # the top-level help is never printed by argparse - show_help renders
+        # it - so no epilog or custom formatter is set up on every parse
+        add_help=False,  # Disable default help to use our Rich styled help
     )
-    codeql_parser.add_argument(
-        "--input", required=True, help="Path to a JSON file with scan results"
+
+    # Add help argument manually
+    parser.add_argument(
+        "-h", "--help", action="store_true", help="Show this help message and exit"
     )
 
-    return parser.parse_args()
+    # create a subparser for each command
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+    command = COMMAND_ALIASES.get(command, command)
+    names = [command] if command in COMMANDS else COMMANDS
+    for name in names:
+        help_text, add_arguments = COMMANDS[name]
+        aliases = [alias for alias, target in COMMAND_ALIASES.items() if target == name]
+        command_parser = subparsers.add_parser(name, aliases=aliases, help=help_text)
+        add_arguments(command_parser)
+        if name in RESULT_COMMANDS:
+            command_parser.add_argument(
+                "--plain",
+                action="store_true",
+                help="Print results as plain text instead of Rich panels",
+            )
+        else:
+            command_parser.set_defaults(plain=False)
 
+    return parser
 
-# execute the features based on the provided arguments
-def execute_features(args):
-    """Execute the requested features based on parsed arguments"""
-
-    # create the client
-    client = create_client()
-
-    results = []
-
-    # if 'progress-report' command is provided, generate a progress report
-    if args.command == "progress-report":
-        create_progress_report(
-            client,
-            repo_path=args.path,
-            days_back=args.days,
-            contributor_filter=args.username,
-            branch=args.branch,
-            use_specific_user_prompt=bool(args.username),
-        )
 
-    # if 'generate-readme' command is provided, generate a README file
-    elif args.command == "generate-readme":
-        readme = generate_readme(client, repo_path=args.path)
-        write_to_readme_file(readme)
-
-    # if 'summarize-by-folder' command is provided, summarize using directory-by-directory approach
-    elif args.command == "summarize-details":
-        summary = summarize_details(client, repo_path=args.path)
-        results.append(("Repository Directory Summary", summary))
-
-    # if 'summarize-entire-directory' command is provided, summarize entire directory
-    elif args.command == "summarize-overview":
-        summary = summarize_overview(client, repo_path=args.path)
-        results.append(("Repository Summary", summary))
-
-    # if 'llm-file-scan' command is provided, analyze files with LLM
-    elif args.command == "llm-file-scan":
-        print("Calling LLM File Scan")
-        from features.code_quality.llm_file_scan import (
-            collect_code_files_from_path,
-            create_llm_file_scan,
-        )
+# parse the arguments from the command line
+def parse_arguments():
+    """Parse and return command line arguments"""
+
+    # the command is always the first argument, so only its options are set up
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    args = build_parser(command).parse_args()
+    # argparse reports the name that was typed, so map aliases back
+    args.command = COMMAND_ALIASES.get(args.command, args.command)
+    return args
+
+
+# one titled block of output; collections is already loaded by argparse, while
+# typing.NamedTuple would add an import to every start
+Result = collections.namedtuple("Result", ["title", "content"])
+
+
+# each handler runs one command and yields its Result objects as they are
+# ready; handlers that print their own output return an empty list
+def handle_progress_report(args):
+    """Generate a progress report"""
+    from features.progress_report.progress_report import create_progress_report
+
+    create_progress_report(
+        create_batch_client() if args.batch else create_client(),
+        repo_path=args.path,
+        days_back=args.days,
+        contributor_filter=args.username,
+        branch=args.branch,
+        use_specific_user_prompt=bool(args.username),
+        max_commits=args.max_commits,
+        include_diffs=not args.no_diffs,
+        stream=args.stream,
+        batch=args.batch,
+    )
+    return []
+
+
+def handle_generate_readme(args):
+    """Generate a README file"""
+    from features.generate_readme.generate_readme import (
+        generate_readme,
+        write_to_readme_file,
+    )
+
+    readme = generate_readme(
+        create_client(), repo_path=args.path, use_cache=not args.no_cache
+    )
+    write_to_readme_file(readme)
+    return []
+
 
-        all_files = []
-        for path in args.files:
-            all_files.extend(
-                collect_code_files_from_path(path, exts={".py"})
-            )  # or whatever extensions you want
+def handle_summarize_details(args):
+    """Summarize the repository directory by directory"""
+    from features.summarize_details.summarize_details import summarize_details
 
-        issues = create_llm_file_scan(client, args.files)
-        # print("LLM Security Issues Output:")
-        # print(json.dumps(issues, indent=2))
-        results.append(("LLM Security Issues", json.dumps(issues, indent=2)))
+    summary = summarize_details(
+        create_batch_client() if args.batch else create_client(),
+        repo_path=args.path,
+        use_cache=not args.no_cache,
+        batch=args.batch,
+    )
+    yield Result("Repository Directory Summary", summary)
+
+
+def handle_summarize_overview(args):
+    """Summarize the entire repository at once"""
+    from features.summarize_overview.summarize_overview import summarize_overview
+
+    summary = summarize_overview(
+        create_batch_client() if args.batch else create_client(),
+        repo_path=args.path,
+        full_content=args.full_content,
+        stream=args.stream,
+        use_cache=not args.no_cache,
+        batch=args.batch,
+    )
+    yield Result("Repository Summary", summary)
+
+
+def handle_llm_file_scan(args):
+    """Analyze code files for security issues with the LLM"""
+    print("Calling LLM File Scan")
+    from features.code_quality.llm_file_scan import (
+        collect_code_files_from_path,
+        create_llm_file_scan,
+    )
+
+    all_files = []
+    for path in args.files:
+        all_files.extend(
+            collect_code_files_from_path(path, exts={".py"})
+        )  # or whatever extensions you want
 
-    # if 'security-scan-summary' command is provided, summarize security scan results in text format
-    elif args.command == "security-scan-summary":
-        from features.code_quality.security_scan_summary import SecurityScanResult
+    # scan the collected files, not the raw arguments, which may be folders
+    issues = create_llm_file_scan(create_client(), all_files)
+    # print("LLM Security Issues Output:")
+    # print(json.dumps(issues, indent=2))
+    yield Result("LLM Security Issues", json.dumps(issues, indent=2))
 
-        with open(args.input) as f:
-            raw = json.load(f)
-        # Convert dicts to SecurityScanResult objects
-        scan_results = [SecurityScanResult(**issue) for issue in raw]
-        summary = summary_text(scan_results)
-        results.append(("Security Scan Summary (Text)", summary))
 
-    elif args.command == "codeql-cwe-summary":
-        with open(args.input) as f:
-            scan_results = json.load(f)
-        summary = generate_codeql_cwe_insights(scan_results, client)
-        results.append(("CodeQL CWE Insights", summary))
+def handle_security_scan_summary(args):
+    """Summarize security scan results in text format"""
+    from features.code_quality.security_scan_summary import (
+        generate_security_scan_summary as summary_text,
+        load_scan_results,
+    )
+
+    # parsed results are cached until the input file changes
+    scan_results = load_scan_results(args.input)
+    summary = summary_text(scan_results)
+    yield Result("Security Scan Summary (Text)", summary)
+
+
+def handle_codeql_cwe_summary(args):
+    """Summarize CodeQL scan results with CWE insights"""
+    from features.code_quality.codeql_cwe_insights import (
+        generate_codeql_cwe_insights,
+        load_scan_results,
+    )
 
-    return results
+    scan_results = load_scan_results(args.input)
+    summary = generate_codeql_cwe_insights(scan_results, create_client())
+    yield Result("CodeQL CWE Insights", summary)
+
+
+# the handler of every command; handlers create the client themselves, so
+# commands that never call the model don't need an API key
+HANDLERS = {
+    "progress-report": handle_progress_report,
+    "generate-readme": handle_generate_readme,
+    "summarize-details": handle_summarize_details,
+    "summarize-overview": handle_summarize_overview,
+    "llm-file-scan": handle_llm_file_scan,
+    "security-scan-summary": handle_security_scan_summary,
+    "codeql-cwe-summary": handle_codeql_cwe_summary,
+}
+
+
+# execute the features based on the provided arguments
+def execute_features(args):
+    """Execute the requested features, yielding each result as it is ready"""
+    yield from HANDLERS[args.command](args)
 
 
 def main():
     """Main function to handle CLI arguments and execute features"""
 
+    # plain help needs no parsing, so skip building the argparse parsers
+    if len(sys.argv) == 1 or sys.argv[1] in HELP_FLAGS:
+        from functions.help_command import show_help
+
+        show_help()
+        return
+
     # parse the arguments
     args = parse_arguments()
 
     # Check if help was requested or no command provided
     if (hasattr(args, "help") and args.help) or not args.command:
+        from functions.help_command import show_help
+
         show_help()
         return
 
-    # execute the requested features
+    # execute the requested features; only the summarize and scan commands
+    # yield results, and each is printed as soon as it is ready
     results = execute_features(args)
 
-    # only apply rich formatting for summarize commands
-    if args.command in [
-        "summarize-details",
-        "summarize-overview",
-        "llm-file-scan",
-        "security-scan-summary",
-        "codeql-cwe-summary",
-    ]:
-        console = Console()
-
-        # print the results with rich formatting
-        for title, content in results:
-            panel = Panel(
-                content,
-                title=f"[bold sky_blue1]{title}[/bold sky_blue1]",
-                title_align="left",
-                border_style="sky_blue2",
-                padding=(1, 2),
-                expand=False,
-                width=min(120, console.size.width - 4),
-            )
-            console.print(panel)
-            console.print()
+    # plain output needs no Rich import or layout pass
+    if args.plain:
+        from functions.simple_panel import print_panel
+
+        for result in results:
+            print_panel(result.title, result.content)
+        return
+
+    console = None
+    # print the results with rich formatting
+    for result in results:
+        # Rich is only imported once there is something to show
+        if console is None:
+            from rich.panel import Panel
+            from rich.text import Text
+            from functions.console import console
+
+            # every panel has the same width, so query the terminal size once
+            panel_width = min(120, console.size.width - 4)
+
+        panel = Panel(
+            result.content,
+            title=Text(result.title, style=PANEL_TITLE_STYLE),
+            title_align="left",
+            border_style="sky_blue2",
+            padding=(1, 2),
+            expand=False,
+            width=panel_width,
+        )
+        console.print(panel)
+        console.print()
 
 
 if __name__ == "__main__":